@@ -1,13 +1,24 @@
-from openai import AsyncOpenAI
 from config import settings
 import logging
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from profiling import outbound_span
 
 logger = logging.getLogger(__name__)
 
+_client = None
+
+def get_openai_client():
+    """Create the OpenAI client on first use; importing openai is slow and only AI routes need it"""
+    global _client
+    if _client is None:
+        from dotenv import load_dotenv
+        from openai import AsyncOpenAI
+        
+        load_dotenv()
+        _client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
 async def generate_redirect_recommendation(error_url: str, site_url: str, existing_pages: list = None):
     """
     Generate AI recommendation for where to redirect a 404 URL
@@ -32,15 +43,16 @@ REASON: [Brief explanation of why this is the best choice]
 """
 
     try:
-        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        client = get_openai_client()
         
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an SEO expert specializing in 404 error recovery and redirect strategies."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        with outbound_span("openai.chat.completions"):
+            response = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": "You are an SEO expert specializing in 404 error recovery and redirect strategies."},
+                    {"role": "user", "content": prompt}
+                ]
+            )
         
         response_text = response.choices[0].message.content
         
@@ -85,15 +97,16 @@ Provide a brief, actionable content suggestion (2-3 sentences).
 """
 
     try:
-        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        client = get_openai_client()
         
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an SEO content strategist helping create content to replace 404 pages."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        with outbound_span("openai.chat.completions"):
+            response = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": "You are an SEO content strategist helping create content to replace 404 pages."},
+                    {"role": "user", "content": prompt}
+                ]
+            )
         
         return response.choices[0].message.content.strip()
     
@@ -0,0 +1,126 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+import json
+import logging
+
+from models import SearchAnalyticsDayDB
+from metrics_history import GSC_FINAL_DELAY_DAYS
+
+logger = logging.getLogger(__name__)
+
+GSC_ROW_LIMIT = 25000
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+def _contiguous_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """Collapse sorted days into (first, last) runs so each run costs one query"""
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] + timedelta(days=1) == day:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+async def _fetch_days(user_id: str, gsc_db, site_url: str, start: date, end: date, dimensions: list) -> Dict[date, list]:
+    """Fetch a date range from GSC with the date dimension added, split into per-day rows"""
+    from gsc_service import query_search_analytics
+
+    by_day: Dict[date, list] = {day: [] for day in _days(start, end)}
+    start_row = 0
+    while True:
+        rows = await query_search_analytics(
+            user_id,
+            gsc_db,
+            site_url,
+            start.strftime("%Y-%m-%d"),
+            end.strftime("%Y-%m-%d"),
+            dimensions=dimensions + ["date"],
+            row_limit=GSC_ROW_LIMIT,
+            start_row=start_row
+        )
+        for row in rows:
+            day = date.fromisoformat(row["keys"][-1])
+            by_day[day].append({
+                "keys": row["keys"][:-1],
+                "clicks": row.get("clicks", 0),
+                "impressions": row.get("impressions", 0),
+                "position": row.get("position", 0),
+            })
+        if len(rows) < GSC_ROW_LIMIT:
+            return by_day
+        start_row += GSC_ROW_LIMIT
+
+def merge_rows(day_rows: Iterable[list]) -> list:
+    """Sum clicks and impressions per key across days; CTR and position are impression-weighted"""
+    merged: Dict[tuple, dict] = {}
+    for rows in day_rows:
+        for row in rows:
+            key = tuple(row["keys"])
+            total = merged.setdefault(key, {"keys": row["keys"], "clicks": 0, "impressions": 0, "weighted_position": 0.0})
+            total["clicks"] += row["clicks"]
+            total["impressions"] += row["impressions"]
+            total["weighted_position"] += row["position"] * row["impressions"]
+
+    result = []
+    for total in merged.values():
+        impressions = total["impressions"]
+        result.append({
+            "keys": total["keys"],
+            "clicks": total["clicks"],
+            "impressions": impressions,
+            "ctr": total["clicks"] / impressions if impressions else 0.0,
+            "position": total.pop("weighted_position") / impressions if impressions else 0.0,
+        })
+    return sorted(result, key=lambda row: row["clicks"], reverse=True)
+
+async def cached_daily_rows(user_id: str, gsc_db, session: AsyncSession, site_url: str, start_date: str, end_date: str,
+                            dimensions: list = None, today: date = None) -> Dict[date, list]:
+    """
+    Search analytics rows per day, stored as one cache partition per day.
+    Only days that are missing, or were cached before GSC finalized them, are fetched.
+    """
+    if not dimensions:
+        dimensions = ["page"]
+    dimensions_key = ",".join(dimensions)
+
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    final_cutoff = (today or datetime.utcnow().date()) - timedelta(days=GSC_FINAL_DELAY_DAYS)
+
+    result = await session.execute(
+        select(SearchAnalyticsDayDB).where(
+            SearchAnalyticsDayDB.site_url == site_url,
+            SearchAnalyticsDayDB.dimensions == dimensions_key,
+            SearchAnalyticsDayDB.day >= start,
+            SearchAnalyticsDayDB.day <= end
+        )
+    )
+    cached = {entry.day: entry for entry in result.scalars().all()}
+
+    stale = [day for day in _days(start, end) if day not in cached or not cached[day].is_final]
+    for range_start, range_end in _contiguous_ranges(stale):
+        fetched = await _fetch_days(user_id, gsc_db, site_url, range_start, range_end, dimensions)
+        for day, rows in fetched.items():
+            entry = cached.get(day)
+            if entry is None:
+                entry = SearchAnalyticsDayDB(site_url=site_url, dimensions=dimensions_key, day=day)
+                session.add(entry)
+                cached[day] = entry
+            entry.rows = json.dumps(rows)
+            entry.is_final = day <= final_cutoff
+            entry.fetched_at = datetime.utcnow()
+
+    if stale:
+        await session.commit()
+        logger.info(f"Fetched {len(stale)} of {len(cached)} days of search analytics for {site_url}")
+
+    return {day: json.loads(cached[day].rows) for day in _days(start, end)}
+
+async def cached_search_analytics(user_id: str, gsc_db, session: AsyncSession, site_url: str, start_date: str, end_date: str,
+                                  dimensions: list = None, today: date = None) -> list:
+    """Cached variant of query_search_analytics, merged from the per-day cache"""
+    by_day = await cached_daily_rows(user_id, gsc_db, session, site_url, start_date, end_date, dimensions, today)
+    return merge_rows(by_day.values())
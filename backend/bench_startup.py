@@ -0,0 +1,95 @@
+"""
+Worker cold-start benchmark.
+
+Every sample runs in a fresh interpreter and measures how long `import server`
+takes and the time until the first request is answered (import, lifespan
+startup including the schema version check, and GET /api/). Needs DATABASE_URL
+pointing at a reachable database for the first-request timing.
+
+    python bench_startup.py --runs 10 --budget-ms 50
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r"""
+import asyncio, json, time
+start = time.perf_counter()
+import server
+imported = time.perf_counter()
+result = {"import_ms": (imported - start) * 1000}
+
+async def first_request():
+    import httpx
+    async with server.app.router.lifespan_context(server.app):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/api/")
+        response.raise_for_status()
+        return started, time.perf_counter()
+
+if {first_request}:
+    started, answered = asyncio.run(first_request())
+    result["startup_ms"] = (started - imported) * 1000
+    result["first_request_ms"] = (answered - start) * 1000
+print(json.dumps(result))
+"""
+
+def run_sample(first_request: bool) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.replace("{first_request}", str(first_request))],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def slowest_imports(limit: int) -> list:
+    """Modules with the largest cumulative import time under -X importtime"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:limit]
+
+def summarize(values: list) -> str:
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return f"median {statistics.median(ordered):7.1f} ms   p95 {p95:7.1f} ms   max {ordered[-1]:7.1f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure worker import time and time to first request")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--skip-request", action="store_true", help="only measure imports (no database needed)")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the median import time exceeds this")
+    args = parser.parse_args()
+
+    samples = [run_sample(not args.skip_request) for _ in range(args.runs)]
+
+    print(f"import server        {summarize([s['import_ms'] for s in samples])}")
+    if not args.skip_request:
+        print(f"lifespan startup     {summarize([s['startup_ms'] for s in samples])}")
+        print(f"time to 1st request  {summarize([s['first_request_ms'] for s in samples])}")
+
+    print(f"\nSlowest imports (cumulative):")
+    for elapsed, name in slowest_imports(args.top):
+        print(f"  {elapsed:8.1f} ms  {name}")
+
+    median_import = statistics.median(s["import_ms"] for s in samples)
+    if args.budget_ms is not None and median_import > args.budget_ms:
+        print(f"\nFAIL: median import {median_import:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
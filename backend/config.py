@@ -10,6 +10,38 @@ class Settings(BaseSettings):
     google_client_secret: str = ""
     google_redirect_uri: str = "http://localhost:8000/api/auth/google/callback"
     
+    # Comma-separated read replica URLs; read-only routes use them when set
+    database_replica_urls: str = ""
+    # After a write, the client's reads stay on the primary this long to see its own changes
+    read_your_writes_seconds: int = 5
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # asyncpg prepared statement cache; set to 0 behind pgbouncer in transaction mode
+    db_statement_cache_size: int = 100
+    
+    # When disabled, workers refuse to start on an outdated schema instead of migrating it
+    auto_migrate: bool = True
+    
+    # Scans triggered sooner than this after the previous one are rejected with 429
+    min_rescan_interval_seconds: int = 300
+    
+    # Fraction of requests and scans profiled at random; 0 disables sampling
+    profile_sample_rate: float = 0.0
+    # Required to force a profile (X-Profile header or ?profile=) and to read profiles; empty disables both
+    profiling_token: str = ""
+    profile_retention: int = 200
+    # Required (X-Metrics-Token header) to read /api/health/db; empty disables the endpoint
+    metrics_token: str = ""
+    
+    # Resolved (fixed/ignored) errors older than this are moved to the archive tables
+    archive_after_days: int = 90
+    archive_batch_size: int = 500
+    # 0 disables the in-process archiver; run `python retention.py` from cron instead
+    archive_interval_minutes: int = 0
+    
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 settings = Settings()
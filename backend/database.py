@@ -1,13 +1,28 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import DeclarativeBase
+from fastapi import Request
 from urllib.parse import urlparse, parse_qs, urlencode
+from typing import Optional
+import itertools
 import os
+import time
 
-def get_async_database_url():
-    url = os.getenv("DATABASE_URL", "")
+from config import settings
+
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+def get_async_database_url(url: Optional[str] = None):
+    if url is None:
+        url = os.getenv("DATABASE_URL", "")
     if not url:
         return ""
     
+    # Local stand-in for load tests and development
+    if url.startswith("sqlite"):
+        return url if url.startswith("sqlite+aiosqlite") else url.replace("sqlite", "sqlite+aiosqlite", 1)
+    
     parsed = urlparse(url)
     query_params = parse_qs(parsed.query)
     query_params.pop('sslmode', None)
@@ -22,18 +37,121 @@ def get_async_database_url():
     
     return new_url
 
+def engine_options(url: str) -> dict:
+    options = {"echo": False}
+    if ":memory:" in url:
+        return options
+    
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    if url.startswith("postgresql+asyncpg"):
+        # SQLAlchemy's own prepared statement cache, then asyncpg's
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
 DATABASE_URL = get_async_database_url()
+REPLICA_URLS = [get_async_database_url(u.strip()) for u in settings.database_replica_urls.split(",") if u.strip()]
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+replica_engines = [create_async_engine(url, **engine_options(url)) for url in REPLICA_URLS]
+replica_sessions = [async_sessionmaker(e, class_=AsyncSession, expire_on_commit=False) for e in replica_engines]
+_next_replica = itertools.cycle(replica_sessions)
+
+# Every engine the app can route a query to, for instrumentation that must see all of them
+all_engines = [engine] + replica_engines
+
+routing_stats = {"primary": 0, "replica": 0, "sticky": 0}
+
 class Base(DeclarativeBase):
     pass
 
+def dialect_insert(session: AsyncSession):
+    """Dialect-specific INSERT supporting ON CONFLICT clauses"""
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
 async def get_db():
     async with async_session() as session:
         yield session
 
+def read_sessionmaker(request: Optional[Request] = None) -> async_sessionmaker:
+    """Session factory for read-only work: a replica unless this client wrote recently"""
+    if not replica_sessions:
+        routing_stats["primary"] += 1
+        return async_session
+    
+    if request is not None:
+        try:
+            sticky_until = float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0))
+        except ValueError:
+            sticky_until = 0
+        if sticky_until > time.time():
+            routing_stats["sticky"] += 1
+            return async_session
+    
+    routing_stats["replica"] += 1
+    return next(_next_replica)
+
+async def get_read_db(request: Request):
+    async with read_sessionmaker(request)() as session:
+        yield session
+
+def _pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"database": engine.url.get_backend_name(), "pool_class": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+            utilization=pool.checkedout() / max(pool.size() + settings.db_max_overflow, 1),
+        )
+    return status
+
+def pool_metrics() -> dict:
+    return {
+        "primary": _pool_status(engine),
+        "replicas": [_pool_status(e) for e in replica_engines],
+        "routing": dict(routing_stats),
+    }
+
+class ReadYourWritesMiddleware:
+    """
+    Marks clients that just made a successful write so their next reads go to the
+    primary until replicas have caught up. Only active when replicas are configured.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_sessions or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_sticky_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + settings.read_your_writes_seconds
+                cookie = (
+                    f"{PRIMARY_STICKY_COOKIE}={until:.3f}; Max-Age={settings.read_your_writes_seconds}; "
+                    f"Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_sticky_cookie)
+
 async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    from migrations import ensure_schema
+    return await ensure_schema(engine)
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """A single listener on a broker channel"""
+    def __init__(self, broker: "InMemoryBroker", channel: str, queue_size: int):
+        self.broker = broker
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Wait for the next event, returning None if the timeout expires first"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class InMemoryBroker:
+    """
+    In-process pub/sub keyed by channel name.
+
+    Only reaches subscribers connected to the same worker. A shared broker
+    (Redis, Postgres LISTEN/NOTIFY, ...) can replace it via set_broker() as
+    long as it provides the same publish/subscribe/unsubscribe methods.
+    """
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    async def publish(self, channel: str, event: str, data: dict):
+        message = {"event": event, "data": data}
+        for subscription in list(self._subscribers.get(channel, ())):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow client must not block publishers; it can resync with a full fetch
+                logger.warning(f"Dropping '{event}' event for slow subscriber on {channel}")
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, self.queue_size)
+        self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.channel)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.channel]
+
+_broker = InMemoryBroker()
+
+def get_broker():
+    return _broker
+
+def set_broker(broker):
+    """Swap the process-wide broker, e.g. for a shared one in multi-worker deployments"""
+    global _broker
+    _broker = broker
+
+def user_channel(user_id: str) -> str:
+    return f"user:{user_id}"
+
+async def publish_user_event(user_id: str, event: str, data: dict):
+    """Publish an event to every open stream of the given user"""
+    await get_broker().publish(user_channel(user_id), event, data)
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode an event as a Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
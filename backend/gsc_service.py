@@ -1,15 +1,22 @@
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request as GoogleRequest
-from motor.motor_asyncio import AsyncIOMotorDatabase
 from config import settings
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
 import logging
 
+from profiling import outbound_span
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorDatabase
+
 logger = logging.getLogger(__name__)
 
-async def get_search_console_service(user_id: str, db: AsyncIOMotorDatabase):
+async def get_search_console_service(user_id: str, db: "AsyncIOMotorDatabase"):
     """Build an authenticated Search Console service"""
+    # The Google client libraries are slow to import, so only load them when a scan needs them
+    from googleapiclient.discovery import build
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request as GoogleRequest
+    
     users_collection = db.users
     user = await users_collection.find_one({"id": user_id}, {"_id": 0})
     
@@ -50,12 +57,13 @@ async def get_search_console_service(user_id: str, db: AsyncIOMotorDatabase):
     service = build("searchconsole", "v1", credentials=credentials)
     return service
 
-async def get_verified_sites(user_id: str, db: AsyncIOMotorDatabase):
+async def get_verified_sites(user_id: str, db: "AsyncIOMotorDatabase"):
     """Get all verified sites from GSC"""
     service = await get_search_console_service(user_id, db)
     
     try:
-        site_list = service.sites().list().execute()
+        with outbound_span("gsc.sites.list"):
+            site_list = service.sites().list().execute()
         
         verified_sites = [
             {
@@ -72,7 +80,8 @@ async def get_verified_sites(user_id: str, db: AsyncIOMotorDatabase):
         logger.error(f"Failed to get verified sites: {e}")
         raise
 
-async def query_search_analytics(user_id: str, db: AsyncIOMotorDatabase, site_url: str, start_date: str, end_date: str, dimensions: list = None):
+async def query_search_analytics(user_id: str, db: "AsyncIOMotorDatabase", site_url: str, start_date: str, end_date: str, dimensions: list = None,
+                                 row_limit: int = 10000, start_row: int = 0):
     """Query search analytics data"""
     service = await get_search_console_service(user_id, db)
     
@@ -83,21 +92,23 @@ async def query_search_analytics(user_id: str, db: AsyncIOMotorDatabase, site_ur
         "startDate": start_date,
         "endDate": end_date,
         "dimensions": dimensions,
-        "rowLimit": 10000
+        "rowLimit": row_limit,
+        "startRow": start_row
     }
     
     try:
-        response = service.searchanalytics().query(
-            siteUrl=site_url,
-            body=request_body
-        ).execute()
+        with outbound_span("gsc.searchanalytics.query"):
+            response = service.searchanalytics().query(
+                siteUrl=site_url,
+                body=request_body
+            ).execute()
         
         return response.get("rows", [])
     except Exception as e:
         logger.error(f"Search analytics query failed: {e}")
         raise
 
-async def inspect_url(user_id: str, db: AsyncIOMotorDatabase, site_url: str, inspection_url: str):
+async def inspect_url(user_id: str, db: "AsyncIOMotorDatabase", site_url: str, inspection_url: str):
     """Inspect a specific URL to check for 404s and indexing issues"""
     service = await get_search_console_service(user_id, db)
     
@@ -107,7 +118,8 @@ async def inspect_url(user_id: str, db: AsyncIOMotorDatabase, site_url: str, ins
     }
     
     try:
-        response = service.urlInspection().index().inspect(body=request_body).execute()
+        with outbound_span("gsc.urlInspection.inspect"):
+            response = service.urlInspection().index().inspect(body=request_body).execute()
         inspection_result = response.get("inspectionResult", {})
         index_status = inspection_result.get("indexStatusResult", {})
         
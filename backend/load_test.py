@@ -0,0 +1,118 @@
+"""
+API load-test harness.
+
+Drives list_errors, get_error_details and get_dashboard_stats for the tenants
+in a seed_data.py manifest at a fixed concurrency and reports throughput and
+latency percentiles per endpoint. Requests go to a running server with
+--base-url, or in-process through the ASGI app otherwise.
+
+    DATABASE_URL=sqlite:///./load.db python load_test.py --concurrency 32 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from auth_handler import create_access_token
+
+ENDPOINT_WEIGHTS = {"list_errors": 0.4, "get_error_details": 0.4, "get_dashboard_stats": 0.2}
+
+def percentile(ordered: list, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+class LoadTest:
+    def __init__(self, manifest: dict, rng: random.Random):
+        self.manifest = manifest
+        self.rng = rng
+        self.tokens = {user_id: create_access_token({"sub": user_id}) for user_id in manifest["users"]}
+        self.sites_by_user = defaultdict(list)
+        for site in manifest["sites"]:
+            self.sites_by_user[site["user_id"]].append(site["id"])
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    def next_request(self):
+        """Pick an endpoint by weight and build a request for a random tenant"""
+        endpoint = self.rng.choices(list(ENDPOINT_WEIGHTS), list(ENDPOINT_WEIGHTS.values()))[0]
+
+        if endpoint == "get_error_details" and self.manifest["errors"]:
+            error = self.rng.choice(self.manifest["errors"])
+            return endpoint, error["user_id"], f"/api/errors/{error['id']}", None
+
+        user_id = self.rng.choice(self.manifest["users"])
+        if endpoint == "list_errors":
+            params = {"status": "new"}
+            if self.sites_by_user[user_id]:
+                params["site_id"] = self.rng.choice(self.sites_by_user[user_id])
+            return endpoint, user_id, "/api/errors", params
+        return "get_dashboard_stats", user_id, "/api/dashboard/stats", None
+
+    async def worker(self, client: httpx.AsyncClient, deadline: float):
+        while time.perf_counter() < deadline:
+            endpoint, user_id, path, params = self.next_request()
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, params=params, cookies={"access_token": self.tokens[user_id]})
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            elapsed = (time.perf_counter() - started) * 1000
+            if ok:
+                self.latencies[endpoint].append(elapsed)
+            else:
+                self.failures[endpoint] += 1
+
+    async def run(self, client: httpx.AsyncClient, concurrency: int, duration: float) -> float:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(self.worker(client, deadline) for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float):
+        print(f"{'endpoint':<22}{'ok':>8}{'failed':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for endpoint in ENDPOINT_WEIGHTS:
+            ordered = sorted(self.latencies[endpoint])
+            print(f"{endpoint:<22}{len(ordered):>8}{self.failures[endpoint]:>8}{len(ordered) / elapsed:>10.1f}"
+                  f"{percentile(ordered, 0.50):>10.1f}{percentile(ordered, 0.95):>10.1f}{percentile(ordered, 0.99):>10.1f}")
+        total = sum(len(v) for v in self.latencies.values())
+        print(f"\n{total} successful requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+
+async def main_async(args):
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+
+    load_test = LoadTest(manifest, random.Random(args.seed))
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits) as client:
+            elapsed = await load_test.run(client, args.concurrency, args.duration)
+    else:
+        from server import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+                elapsed = await load_test.run(client, args.concurrency, args.duration)
+
+    load_test.report(elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the errors and dashboard API")
+    parser.add_argument("--manifest", default="loadtest_manifest.json")
+    parser.add_argument("--base-url", default=None, help="target a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=404)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
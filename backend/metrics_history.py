@@ -0,0 +1,174 @@
+from sqlalchemy import select, func, case, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+import math
+
+from database import dialect_insert
+from models import UrlKeyDB, UrlMetricDailyDB
+
+# GSC keeps revising the most recent days; only these older days are stored
+GSC_FINAL_DELAY_DAYS = 3
+
+TREND_WINDOW_DAYS = 7
+BASELINE_WINDOWS = 4
+
+# Keeps multi-row statements under the driver bind-parameter limits
+BATCH_SIZE = 1000
+
+def _chunks(items: list, size: int = BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def partition_name(day: date) -> str:
+    return f"url_metrics_daily_y{day.year}m{day.month:02d}"
+
+async def ensure_month_partitions(session: AsyncSession, days: Iterable[date]):
+    """Create the monthly partitions covering the given days (Postgres only)"""
+    if session.bind.dialect.name != "postgresql":
+        return
+    for month in sorted({_month_start(d) for d in days}):
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+            f"PARTITION OF url_metrics_daily "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        ))
+
+async def resolve_url_keys(session: AsyncSession, site_id: str, urls: Iterable[str], create: bool = True) -> Dict[str, int]:
+    """Map URLs of a site to their integer keys, allocating keys for unseen URLs"""
+    urls = list(set(urls))
+    keys: Dict[str, int] = {}
+
+    for batch in _chunks(urls):
+        result = await session.execute(
+            select(UrlKeyDB.url, UrlKeyDB.id).where(UrlKeyDB.site_id == site_id, UrlKeyDB.url.in_(batch))
+        )
+        keys.update(result.all())
+
+    missing = [url for url in urls if url not in keys]
+    if missing and create:
+        insert = dialect_insert(session)
+        for batch in _chunks(missing):
+            await session.execute(
+                insert(UrlKeyDB)
+                .values([{"site_id": site_id, "url": url} for url in batch])
+                .on_conflict_do_nothing(index_elements=["site_id", "url"])
+            )
+            result = await session.execute(
+                select(UrlKeyDB.url, UrlKeyDB.id).where(UrlKeyDB.site_id == site_id, UrlKeyDB.url.in_(batch))
+            )
+            keys.update(result.all())
+
+    return keys
+
+async def ingest_daily_rows(session: AsyncSession, site_id: str, rows: List[dict], today: date = None) -> int:
+    """
+    Append search analytics rows with ["page", "date"] dimensions to the history.
+    Days already stored are left untouched, as are days GSC has not finalized yet.
+    """
+    cutoff = (today or datetime.utcnow().date()) - timedelta(days=GSC_FINAL_DELAY_DAYS)
+
+    parsed: List[Tuple[str, date, int, int]] = []
+    for row in rows:
+        page_url, day_str = row["keys"][0], row["keys"][1]
+        day = date.fromisoformat(day_str)
+        if day > cutoff:
+            continue
+        parsed.append((page_url, day, int(row.get("impressions", 0)), int(row.get("clicks", 0))))
+
+    if not parsed:
+        return 0
+
+    keys = await resolve_url_keys(session, site_id, (p[0] for p in parsed))
+    await ensure_month_partitions(session, (p[1] for p in parsed))
+
+    insert = dialect_insert(session)
+    stored = 0
+    for batch in _chunks(parsed):
+        result = await session.execute(
+            insert(UrlMetricDailyDB)
+            .values([
+                {"url_key": keys[url], "day": day, "impressions": impressions, "clicks": clicks}
+                for url, day, impressions, clicks in batch
+            ])
+            .on_conflict_do_nothing(index_elements=["url_key", "day"])
+        )
+        stored += result.rowcount or 0
+    await session.commit()
+
+    return stored
+
+async def ingest_cached_days(session: AsyncSession, site_id: str, by_day: Dict[date, list], today: date = None) -> int:
+    """Append per-day ["page"] rows from the analytics day cache to the history"""
+    rows = [
+        {"keys": [row["keys"][0], day.isoformat()], "impressions": row["impressions"], "clicks": row["clicks"]}
+        for day, day_rows in by_day.items()
+        for row in day_rows
+    ]
+    return await ingest_daily_rows(session, site_id, rows, today=today)
+
+async def windowed_metrics(session: AsyncSession, site_id: str, urls: Iterable[str], as_of: date = None,
+                           window_days: int = TREND_WINDOW_DAYS, baseline_windows: int = BASELINE_WINDOWS) -> Dict[str, dict]:
+    """
+    Impressions and clicks per URL for the latest window and the preceding baseline
+    windows, computed in one aggregate query over the stored history.
+    """
+    keys = await resolve_url_keys(session, site_id, urls, create=False)
+    if not keys:
+        return {}
+
+    end = as_of or (datetime.utcnow().date() - timedelta(days=GSC_FINAL_DELAY_DAYS))
+    window_start = end - timedelta(days=window_days - 1)
+    baseline_start = window_start - timedelta(days=window_days * baseline_windows)
+
+    in_window = UrlMetricDailyDB.day >= window_start
+    result = await session.execute(
+        select(
+            UrlMetricDailyDB.url_key,
+            func.sum(case((in_window, UrlMetricDailyDB.impressions), else_=0)),
+            func.sum(case((in_window, UrlMetricDailyDB.clicks), else_=0)),
+            func.sum(case((in_window, 0), else_=UrlMetricDailyDB.impressions)),
+            func.sum(case((in_window, 0), else_=UrlMetricDailyDB.clicks)),
+        )
+        .where(
+            UrlMetricDailyDB.url_key.in_(keys.values()),
+            UrlMetricDailyDB.day >= baseline_start,
+            UrlMetricDailyDB.day <= end
+        )
+        .group_by(UrlMetricDailyDB.url_key)
+    )
+
+    urls_by_key = {key: url for url, key in keys.items()}
+    return {
+        urls_by_key[url_key]: {
+            "impressions": impressions or 0,
+            "clicks": clicks or 0,
+            "baseline_impressions": (baseline_impressions or 0) / baseline_windows,
+            "baseline_clicks": (baseline_clicks or 0) / baseline_windows,
+        }
+        for url_key, impressions, clicks, baseline_impressions, baseline_clicks in result.all()
+    }
+
+def trend_priority_score(metrics: dict) -> int:
+    """
+    Score 0-100 from the historical reach of a URL and how much of it was lost
+    in the latest window compared to the baseline average.
+    """
+    baseline = metrics["baseline_impressions"]
+    recent = metrics["impressions"]
+
+    reach = min(60.0, math.log10(1 + max(baseline, recent)) * 15)
+    lost_fraction = max(baseline - recent, 0) / baseline if baseline else 0.0
+
+    return int(round(reach + 40 * lost_fraction))
+
+async def history_priority_scores(session: AsyncSession, site_id: str, urls: Iterable[str], as_of: date = None) -> Dict[str, int]:
+    """Trend-aware priority scores for URLs that have stored history"""
+    metrics = await windowed_metrics(session, site_id, urls, as_of=as_of)
+    return {url: trend_priority_score(m) for url, m in metrics.items()}
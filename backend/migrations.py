@@ -0,0 +1,301 @@
+"""
+Versioned schema migrations.
+
+Each migration runs once, in version order, and is recorded in the
+schema_migrations table. Workers only compare the recorded version with
+LATEST_VERSION on startup; run `python migrations.py` as a release step to
+apply pending migrations ahead of a deploy.
+
+Migrations declare their own tables as they were at that version rather than
+using the ORM models, so applying an old migration always produces the same
+schema. Later model changes need a new migration (e.g. ALTER TABLE), never an
+edit to an existing one.
+"""
+from sqlalchemy import (
+    Column, Integer, String, Float, Boolean, Date, DateTime, Text, LargeBinary, ForeignKey, Index, UniqueConstraint,
+    MetaData, Table, select, func, text, inspect
+)
+from sqlalchemy.ext.asyncio import AsyncEngine
+from datetime import datetime
+from typing import Callable, List, Tuple
+import asyncio
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key that serializes concurrent migrators on Postgres
+MIGRATION_LOCK_ID = 404_0001
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = []
+
+def migration(version: int, description: str):
+    """Register a function taking a sync connection as the given schema version"""
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+@migration(1, "Baseline schema")
+def _baseline(conn):
+    metadata = MetaData()
+    Table(
+        "users", metadata,
+        Column("id", String, primary_key=True),
+        Column("email", String, unique=True, nullable=False),
+        Column("google_id", String, nullable=True),
+        Column("google_access_token", Text, nullable=True),
+        Column("google_refresh_token", Text, nullable=True),
+        Column("google_token_expiry", DateTime, nullable=True),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    Table(
+        "sites", metadata,
+        Column("id", String, primary_key=True),
+        Column("user_id", String, ForeignKey("users.id"), nullable=False),
+        Column("site_url", String, nullable=False),
+        Column("site_type", String),
+        Column("permission_level", String, nullable=False),
+        Column("last_scan", DateTime, nullable=True),
+        Column("status", String),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    Table(
+        "errors_404", metadata,
+        Column("id", String, primary_key=True),
+        Column("site_id", String, ForeignKey("sites.id"), nullable=False),
+        Column("url", String, nullable=False),
+        Column("backlink_count", Integer),
+        Column("priority_score", Integer),
+        Column("status", String),
+        Column("detected_at", DateTime),
+        Column("last_checked", DateTime),
+        Column("impressions", Integer),
+        Column("clicks", Integer),
+    )
+    Table(
+        "backlinks", metadata,
+        Column("id", String, primary_key=True),
+        Column("error_id", String, ForeignKey("errors_404.id"), nullable=False),
+        Column("source_url", String, nullable=False),
+        Column("anchor_text", String, nullable=True),
+        Column("discovered_at", DateTime),
+    )
+    Table(
+        "recommendations", metadata,
+        Column("id", String, primary_key=True),
+        Column("error_id", String, ForeignKey("errors_404.id"), nullable=False, unique=True),
+        Column("redirect_target", String, nullable=True),
+        Column("redirect_reason", Text, nullable=True),
+        Column("content_suggestion", Text, nullable=True),
+        Column("generated_at", DateTime),
+    )
+    Table(
+        "scan_logs", metadata,
+        Column("id", String, primary_key=True),
+        Column("site_id", String, ForeignKey("sites.id"), nullable=False),
+        Column("scan_type", String, nullable=False),
+        Column("status", String, nullable=False),
+        Column("errors_found", Integer),
+        Column("started_at", DateTime),
+        Column("completed_at", DateTime, nullable=True),
+        Column("error_message", Text, nullable=True),
+    )
+    Table(
+        "url_keys", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("site_id", String, ForeignKey("sites.id"), nullable=False),
+        Column("url", String, nullable=False),
+        UniqueConstraint("site_id", "url", name="uq_url_keys_site_url"),
+    )
+    Table(
+        "url_metrics_daily", metadata,
+        Column("url_key", Integer, primary_key=True),
+        Column("day", Date, primary_key=True),
+        Column("impressions", Integer, nullable=False),
+        Column("clicks", Integer, nullable=False),
+        Index("ix_url_metrics_daily_day", "day"),
+        postgresql_partition_by="RANGE (day)",
+    )
+    # create_all skips existing tables, so databases created before migrations adopt this as-is
+    metadata.create_all(conn)
+
+@migration(2, "Search analytics day cache")
+def _search_analytics_days(conn):
+    metadata = MetaData()
+    Table(
+        "search_analytics_days", metadata,
+        Column("site_url", String, primary_key=True),
+        Column("dimensions", String, primary_key=True),
+        Column("day", Date, primary_key=True),
+        Column("rows", Text, nullable=False),
+        Column("is_final", Boolean, nullable=False),
+        Column("fetched_at", DateTime),
+    )
+    metadata.create_all(conn)
+
+@migration(3, "Archive tables for resolved errors")
+def _archive_tables(conn):
+    metadata = MetaData()
+    # Existing tables, declared only as far as the new DDL refers to them
+    Table("sites", metadata, Column("id", String, primary_key=True))
+    errors_404 = Table("errors_404", metadata, Column("status", String), Column("last_checked", DateTime))
+
+    errors_archive = Table(
+        "errors_404_archive", metadata,
+        Column("id", String, primary_key=True),
+        Column("site_id", String, ForeignKey("sites.id"), nullable=False),
+        Column("url", String, nullable=False),
+        Column("backlink_count", Integer),
+        Column("priority_score", Integer),
+        Column("status", String, nullable=False),
+        Column("detected_at", DateTime),
+        Column("last_checked", DateTime),
+        Column("impressions", Integer),
+        Column("clicks", Integer),
+        Column("archived_at", DateTime),
+        Index("ix_errors_404_archive_site_status", "site_id", "status"),
+    )
+    backlinks_archive = Table(
+        "backlinks_archive", metadata,
+        Column("id", String, primary_key=True),
+        Column("error_id", String, nullable=False, index=True),
+        Column("source_url", String, nullable=False),
+        Column("anchor_text", String, nullable=True),
+        Column("discovered_at", DateTime),
+    )
+    recommendations_archive = Table(
+        "recommendations_archive", metadata,
+        Column("id", String, primary_key=True),
+        Column("error_id", String, nullable=False, unique=True),
+        Column("redirect_target", String, nullable=True),
+        Column("redirect_reason", Text, nullable=True),
+        Column("content_suggestion", Text, nullable=True),
+        Column("generated_at", DateTime),
+    )
+    metadata.create_all(conn, tables=[errors_archive, backlinks_archive, recommendations_archive])
+    Index("ix_errors_404_status_last_checked", errors_404.c.status, errors_404.c.last_checked).create(conn, checkfirst=True)
+
+@migration(4, "Request and scan profiles")
+def _request_profiles(conn):
+    metadata = MetaData()
+    Table(
+        "request_profiles", metadata,
+        Column("id", String, primary_key=True),
+        Column("kind", String, nullable=False),
+        Column("name", String, nullable=False),
+        Column("started_at", DateTime, index=True),
+        Column("duration_ms", Float, nullable=False),
+        Column("stats", LargeBinary, nullable=False),
+        Column("top_functions", Text, nullable=False),
+        Column("sql_timings", Text, nullable=False),
+        Column("spans", Text, nullable=False),
+    )
+    metadata.create_all(conn)
+
+@migration(5, "Archive lookup by site and URL for rescans")
+def _archive_site_url_index(conn):
+    errors_archive = Table("errors_404_archive", MetaData(), Column("site_id", String), Column("url", String))
+    Index("ix_errors_404_archive_site_url", errors_archive.c.site_id, errors_archive.c.url).create(conn, checkfirst=True)
+
+@migration(6, "Index backlinks by error")
+def _backlinks_error_index(conn):
+    # Archive batches and errors_404 foreign key checks look backlinks up by error_id
+    backlinks = Table("backlinks", MetaData(), Column("error_id", String))
+    Index("ix_backlinks_error_id", backlinks.c.error_id).create(conn, checkfirst=True)
+
+@migration(7, "Archived error counts per site and status")
+def _archive_summary(conn):
+    metadata = MetaData()
+    Table("sites", metadata, Column("id", String, primary_key=True))
+    summary = Table(
+        "errors_404_archive_summary", metadata,
+        Column("site_id", String, ForeignKey("sites.id"), primary_key=True),
+        Column("status", String, primary_key=True),
+        Column("error_count", Integer, nullable=False),
+        Column("backlink_count", Integer, nullable=False),
+    )
+    metadata.create_all(conn, tables=[summary])
+
+    # Backfill from whatever was archived before the summary existed
+    conn.execute(text(
+        "INSERT INTO errors_404_archive_summary (site_id, status, error_count, backlink_count) "
+        "SELECT site_id, status, COUNT(*), COALESCE(SUM(backlink_count), 0) "
+        "FROM errors_404_archive GROUP BY site_id, status"
+    ))
+
+@migration(8, "Concurrent request count on profiles")
+def _profile_concurrency(conn):
+    conn.execute(text("ALTER TABLE request_profiles ADD COLUMN concurrent_requests INTEGER NOT NULL DEFAULT 0"))
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def _current_version(conn) -> int:
+    if not inspect(conn).has_table("schema_migrations"):
+        return 0
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+async def get_schema_version(engine: AsyncEngine) -> int:
+    async with engine.connect() as conn:
+        return await conn.run_sync(_current_version)
+
+def _apply_pending(conn) -> int:
+    migration_metadata.create_all(conn)
+    current = _current_version(conn)
+
+    for version, description, fn in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info(f"Applying migration {version}: {description}")
+        fn(conn)
+        conn.execute(schema_migrations.insert().values(
+            version=version, description=description, applied_at=datetime.utcnow()
+        ))
+        current = version
+
+    return current
+
+async def migrate(engine: AsyncEngine) -> int:
+    """Apply all pending migrations in a single transaction"""
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        return await conn.run_sync(_apply_pending)
+
+async def ensure_schema(engine: AsyncEngine, auto_migrate: bool = None) -> int:
+    """Check the schema version once at startup, migrating only when it is behind"""
+    if auto_migrate is None:
+        auto_migrate = settings.auto_migrate
+
+    version = await get_schema_version(engine)
+    if version >= latest_version():
+        return version
+
+    if not auto_migrate:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {latest_version()}; "
+            f"run `python migrations.py` to upgrade"
+        )
+
+    version = await migrate(engine)
+    logger.info(f"Database schema migrated to version {version}")
+    return version
+
+if __name__ == "__main__":
+    from database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"Schema version: {asyncio.run(migrate(engine))}")
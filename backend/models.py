@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, Boolean, Date, DateTime, Text, LargeBinary, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 import uuid
 
@@ -55,11 +55,13 @@ class Error404DB(Base):
     site = relationship("SiteDB", back_populates="errors")
     backlinks = relationship("BacklinkDB", back_populates="error")
     recommendation = relationship("RecommendationDB", back_populates="error", uselist=False)
+    
+    __table_args__ = (Index("ix_errors_404_status_last_checked", "status", "last_checked"),)
 
 class BacklinkDB(Base):
     __tablename__ = "backlinks"
     id = Column(String, primary_key=True, default=generate_uuid)
-    error_id = Column(String, ForeignKey("errors_404.id"), nullable=False)
+    error_id = Column(String, ForeignKey("errors_404.id"), nullable=False, index=True)
     source_url = Column(String, nullable=False)
     anchor_text = Column(String, nullable=True)
     discovered_at = Column(DateTime, default=datetime.utcnow)
@@ -90,11 +92,113 @@ class ScanLogDB(Base):
     
     site = relationship("SiteDB", back_populates="scan_logs")
 
+class ArchivedError404DB(Base):
+    """Resolved errors moved out of errors_404 by the retention job"""
+    __tablename__ = "errors_404_archive"
+    id = Column(String, primary_key=True)
+    site_id = Column(String, ForeignKey("sites.id"), nullable=False)
+    url = Column(String, nullable=False)
+    backlink_count = Column(Integer, default=0)
+    priority_score = Column(Integer, default=0)
+    status = Column(String, nullable=False)
+    detected_at = Column(DateTime)
+    last_checked = Column(DateTime)
+    impressions = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_errors_404_archive_site_status", "site_id", "status"),
+        Index("ix_errors_404_archive_site_url", "site_id", "url"),
+    )
+
+class ArchiveSummaryDB(Base):
+    """Archived error counts per site and status, kept in step by the retention job"""
+    __tablename__ = "errors_404_archive_summary"
+    site_id = Column(String, ForeignKey("sites.id"), primary_key=True)
+    status = Column(String, primary_key=True)
+    error_count = Column(Integer, nullable=False, default=0)
+    backlink_count = Column(Integer, nullable=False, default=0)
+
+class ArchivedBacklinkDB(Base):
+    __tablename__ = "backlinks_archive"
+    id = Column(String, primary_key=True)
+    error_id = Column(String, nullable=False, index=True)
+    source_url = Column(String, nullable=False)
+    anchor_text = Column(String, nullable=True)
+    discovered_at = Column(DateTime)
+
+class ArchivedRecommendationDB(Base):
+    __tablename__ = "recommendations_archive"
+    id = Column(String, primary_key=True)
+    error_id = Column(String, nullable=False, unique=True)
+    redirect_target = Column(String, nullable=True)
+    redirect_reason = Column(Text, nullable=True)
+    content_suggestion = Column(Text, nullable=True)
+    generated_at = Column(DateTime)
+
+class UrlKeyDB(Base):
+    __tablename__ = "url_keys"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    site_id = Column(String, ForeignKey("sites.id"), nullable=False)
+    url = Column(String, nullable=False)
+    
+    __table_args__ = (UniqueConstraint("site_id", "url", name="uq_url_keys_site_url"),)
+
+class UrlMetricDailyDB(Base):
+    """Append-only daily search metrics per URL, range-partitioned by month on Postgres"""
+    __tablename__ = "url_metrics_daily"
+    url_key = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    impressions = Column(Integer, nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index("ix_url_metrics_daily_day", "day"),
+        {"postgresql_partition_by": "RANGE (day)"},
+    )
+
+class SearchAnalyticsDayDB(Base):
+    """Cached search analytics rows for one property, dimension set and day"""
+    __tablename__ = "search_analytics_days"
+    site_url = Column(String, primary_key=True)
+    dimensions = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    rows = Column(Text, nullable=False)
+    is_final = Column(Boolean, nullable=False, default=False)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+class RequestProfileDB(Base):
+    """A captured request or scan profile, kept up to the configured retention cap"""
+    __tablename__ = "request_profiles"
+    id = Column(String, primary_key=True, default=generate_uuid)
+    kind = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
+    duration_ms = Column(Float, nullable=False)
+    # cProfile samples the whole event loop, so stats include work for every concurrent request
+    concurrent_requests = Column(Integer, nullable=False, default=0)
+    stats = Column(LargeBinary, nullable=False)
+    top_functions = Column(Text, nullable=False)
+    sql_timings = Column(Text, nullable=False)
+    spans = Column(Text, nullable=False)
+
 class SiteCreate(BaseModel):
     site_url: str
 
+ERROR_STATUSES = ("new", "fixed", "ignored")
+
 class Error404Update(BaseModel):
     status: str
 
+class Error404BulkUpdate(BaseModel):
+    status: str
+    ids: Optional[List[str]] = None
+    site_id: Optional[str] = None
+    current_status: Optional[str] = None
+    min_priority: Optional[int] = None
+    max_priority: Optional[int] = None
+    url_prefix: Optional[str] = None
+
 class ScanTrigger(BaseModel):
     site_id: str
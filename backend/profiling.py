@@ -0,0 +1,228 @@
+from sqlalchemy import event, select, delete
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from typing import Optional
+from urllib.parse import parse_qs
+import cProfile
+import hmac
+import io
+import json
+import logging
+import marshal
+import pstats
+import random
+import time
+import uuid
+
+from config import settings
+from database import all_engines, async_session
+from models import RequestProfileDB
+
+logger = logging.getLogger(__name__)
+
+TOP_FUNCTIONS = 40
+MAX_SQL_STATEMENT_LENGTH = 2000
+# Long-lived streams would hold the single profiler slot indefinitely
+UNPROFILED_PATH_PREFIXES = ("/api/events", "/api/profiles")
+# Label for CPU stats, which cover everything the loop ran, not just the profiled request
+CPU_SCOPE = "event-loop"
+
+_current: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+# cProfile hooks the whole thread, so only one profile can be recorded at a time
+_active: Optional["Profile"] = None
+# HTTP requests currently being served; a profile's CPU stats include all of them
+_in_flight = 0
+
+class Profile:
+    def __init__(self, kind: str, name: str):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.name = name
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+        self.sql = []
+        self.spans = []
+        # Peak number of requests in flight while recording, the profiled one included
+        self.concurrent_requests = _in_flight
+        self.profiler = cProfile.Profile()
+
+    def top_functions(self) -> list:
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "total_ms": total * 1000,
+                "cumulative_ms": cumulative * 1000,
+            })
+        return sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:TOP_FUNCTIONS]
+
+def token_matches(candidate: Optional[str]) -> bool:
+    return bool(settings.profiling_token) and candidate is not None and hmac.compare_digest(candidate, settings.profiling_token)
+
+def should_sample() -> bool:
+    return settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate
+
+@asynccontextmanager
+async def profiled(kind: str, name: str, force: bool = False):
+    """Profile the enclosed block when forced or sampled; yields the Profile or None"""
+    global _active
+    if _active is not None or not (force or should_sample()):
+        yield None
+        return
+
+    profile = _active = Profile(kind, name)
+    token = _current.set(profile)
+    profile.profiler.enable()
+    try:
+        yield profile
+    finally:
+        profile.profiler.disable()
+        profile.duration_ms = (time.perf_counter() - profile.started) * 1000
+        _current.reset(token)
+        _active = None
+        try:
+            await save_profile(profile)
+        except Exception as e:
+            logger.error(f"Failed to store profile {profile.id}: {e}")
+
+def profiled_coroutine(kind: str):
+    """Decorator sampling every call of an async function as a profile of the given kind"""
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            async with profiled(kind, fn.__name__):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def outbound_span(name: str):
+    """Time an outbound call (AI, Google APIs) into the active profile, if any"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        profile.spans.append({
+            "name": name,
+            "offset_ms": (started - profile.started) * 1000,
+            "duration_ms": (time.perf_counter() - started) * 1000,
+            "error": error,
+        })
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is None or not starts:
+        return
+    # Statements only; bound parameters may hold user data
+    profile.sql.append({
+        "statement": statement[:MAX_SQL_STATEMENT_LENGTH],
+        "duration_ms": (time.perf_counter() - starts.pop()) * 1000,
+        "executemany": executemany,
+    })
+
+# Replicas included, so reads routed away from the primary still show up in profiles
+for _engine in all_engines:
+    event.listen(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+async def save_profile(profile: Profile):
+    profile.profiler.create_stats()
+    async with async_session() as session:
+        session.add(RequestProfileDB(
+            id=profile.id,
+            kind=profile.kind,
+            name=profile.name,
+            started_at=profile.started_at,
+            duration_ms=profile.duration_ms,
+            concurrent_requests=profile.concurrent_requests,
+            stats=marshal.dumps(profile.profiler.stats),
+            top_functions=json.dumps(profile.top_functions()),
+            sql_timings=json.dumps(profile.sql),
+            spans=json.dumps(profile.spans),
+        ))
+        await session.flush()
+
+        # Retention cap: drop everything older than the newest N profiles
+        cutoff = await session.execute(
+            select(RequestProfileDB.started_at)
+            .order_by(RequestProfileDB.started_at.desc())
+            .offset(settings.profile_retention)
+            .limit(1)
+        )
+        oldest_kept = cutoff.scalar_one_or_none()
+        if oldest_kept is not None:
+            await session.execute(delete(RequestProfileDB).where(RequestProfileDB.started_at <= oldest_kept))
+        await session.commit()
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware so unprofiled requests pay only for a couple of checks.
+    A request is profiled when sampled or when it carries the profiling token in
+    an X-Profile header or a ?profile= query parameter. Every request is counted
+    while in flight, since cProfile also records whatever else the loop runs.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    def _forced(self, scope) -> bool:
+        if not settings.profiling_token:
+            return False
+        for key, value in scope["headers"]:
+            if key == b"x-profile":
+                return token_matches(value.decode("latin-1"))
+        if b"profile=" in scope["query_string"]:
+            values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+            return bool(values) and token_matches(values[0])
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(UNPROFILED_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        global _in_flight
+        _in_flight += 1
+        if _active is not None:
+            _active.concurrent_requests = max(_active.concurrent_requests, _in_flight)
+        try:
+            await self._serve(scope, receive, send)
+        finally:
+            _in_flight -= 1
+
+    async def _serve(self, scope, receive, send):
+        if _active is not None:
+            await self.app(scope, receive, send)
+            return
+
+        force = self._forced(scope)
+        if not force and not should_sample():
+            await self.app(scope, receive, send)
+            return
+
+        async with profiled("request", f"{scope['method']} {scope['path']}", force=True) as profile:
+            async def send_with_profile_id(message):
+                if message["type"] == "http.response.start" and profile is not None:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile.id.encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_with_profile_id)
@@ -0,0 +1,119 @@
+from sqlalchemy import select, insert, delete, literal, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import logging
+
+from config import settings
+from database import dialect_insert
+from models import (
+    Error404DB, BacklinkDB, RecommendationDB,
+    ArchivedError404DB, ArchivedBacklinkDB, ArchivedRecommendationDB, ArchiveSummaryDB
+)
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_STATUSES = ("fixed", "ignored")
+
+ERROR_COLUMNS = [
+    "id", "site_id", "url", "backlink_count", "priority_score", "status",
+    "detected_at", "last_checked", "impressions", "clicks"
+]
+BACKLINK_COLUMNS = ["id", "error_id", "source_url", "anchor_text", "discovered_at"]
+RECOMMENDATION_COLUMNS = ["id", "error_id", "redirect_target", "redirect_reason", "content_suggestion", "generated_at"]
+
+def _copy(source, target, columns, condition, extra: dict = None):
+    """INSERT INTO target (...) SELECT ... FROM source WHERE condition"""
+    extra = extra or {}
+    selected = [getattr(source, c) for c in columns] + [literal(v) for v in extra.values()]
+    return insert(target).from_select(columns + list(extra.keys()), select(*selected).where(condition))
+
+async def _add_to_summary(session: AsyncSession, ids: list):
+    """Fold a batch into the per-site, per-status counts the dashboard reads instead of the archive"""
+    result = await session.execute(
+        select(Error404DB.site_id, Error404DB.status, func.count(), func.coalesce(func.sum(Error404DB.backlink_count), 0))
+        .where(Error404DB.id.in_(ids))
+        .group_by(Error404DB.site_id, Error404DB.status)
+    )
+    rows = [
+        {"site_id": site_id, "status": status, "error_count": count, "backlink_count": backlinks}
+        for site_id, status, count, backlinks in result.all()
+    ]
+    stmt = dialect_insert(session)(ArchiveSummaryDB).values(rows)
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=["site_id", "status"],
+        set_={
+            "error_count": ArchiveSummaryDB.error_count + stmt.excluded.error_count,
+            "backlink_count": ArchiveSummaryDB.backlink_count + stmt.excluded.backlink_count,
+        }
+    ))
+
+async def archive_batch(session: AsyncSession, cutoff: datetime, batch_size: int) -> int:
+    """Move one batch of resolved errors, with their backlinks and recommendation, to the archive"""
+    candidates = (
+        select(Error404DB.id)
+        .where(Error404DB.status.in_(RESOLVED_STATUSES), Error404DB.last_checked < cutoff)
+        .limit(batch_size)
+    )
+    if session.bind.dialect.name == "postgresql":
+        # Rows being edited by requests are skipped and picked up by a later run
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    ids = (await session.execute(candidates)).scalars().all()
+    if not ids:
+        return 0
+
+    now = datetime.utcnow()
+    await session.execute(_copy(Error404DB, ArchivedError404DB, ERROR_COLUMNS, Error404DB.id.in_(ids), {"archived_at": now}))
+    await session.execute(_copy(BacklinkDB, ArchivedBacklinkDB, BACKLINK_COLUMNS, BacklinkDB.error_id.in_(ids)))
+    await session.execute(_copy(RecommendationDB, ArchivedRecommendationDB, RECOMMENDATION_COLUMNS, RecommendationDB.error_id.in_(ids)))
+
+    await _add_to_summary(session, ids)
+
+    await session.execute(delete(BacklinkDB).where(BacklinkDB.error_id.in_(ids)))
+    await session.execute(delete(RecommendationDB).where(RecommendationDB.error_id.in_(ids)))
+    await session.execute(delete(Error404DB).where(Error404DB.id.in_(ids)))
+    await session.commit()
+
+    return len(ids)
+
+async def archive_resolved_errors(session_factory: async_sessionmaker, older_than_days: int = None,
+                                  batch_size: int = None, max_batches: Optional[int] = None) -> int:
+    """
+    Archive resolved errors last checked more than `older_than_days` ago.
+    Each batch is its own short transaction so the live table is never locked for long.
+    """
+    older_than_days = settings.archive_after_days if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.archive_batch_size
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        async with session_factory() as session:
+            moved = await archive_batch(session, cutoff, batch_size)
+        if not moved:
+            break
+        archived += moved
+        batches += 1
+        # Yield between batches so request handlers sharing the loop stay responsive
+        await asyncio.sleep(0)
+
+    if archived:
+        logger.info(f"Archived {archived} resolved errors older than {older_than_days} days")
+    return archived
+
+async def run_archiver_periodically(session_factory: async_sessionmaker, interval_minutes: int):
+    while True:
+        try:
+            await archive_resolved_errors(session_factory)
+        except Exception as e:
+            logger.error(f"Archiving resolved errors failed: {e}")
+        await asyncio.sleep(interval_minutes * 60)
+
+if __name__ == "__main__":
+    from database import async_session
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"Archived {asyncio.run(archive_resolved_errors(async_session))} errors")
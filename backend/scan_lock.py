@@ -0,0 +1,58 @@
+from sqlalchemy import text
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Tuple
+import asyncio
+import logging
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-key advisory lock, so scan locks can't collide with other users of advisory locks
+SCAN_LOCK_NAMESPACE = 404_0002
+
+@asynccontextmanager
+async def site_scan_lock(site_id: str):
+    """
+    Hold a Postgres advisory lock for the site across all workers.
+    Other databases rely on the in-process coordination of ScanCoordinator alone.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    async with engine.connect() as conn:
+        params = {"namespace": SCAN_LOCK_NAMESPACE, "site_id": site_id}
+        await conn.execute(text("SELECT pg_advisory_lock(:namespace, hashtext(:site_id))"), params)
+        await conn.commit()
+        try:
+            yield
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:namespace, hashtext(:site_id))"), params)
+            await conn.commit()
+
+class ScanCoordinator:
+    """Runs at most one scan per site per process and lets concurrent triggers share its result"""
+    def __init__(self):
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def is_running(self, site_id: str) -> bool:
+        return site_id in self._running
+
+    async def run(self, site_id: str, scan: Callable[[], Awaitable[dict]]) -> Tuple[dict, bool]:
+        """Return the scan result and whether it came from a scan started by another trigger"""
+        task = self._running.get(site_id)
+        if task is not None:
+            # Shielded so one caller disconnecting doesn't cancel the scan for everyone else
+            return await asyncio.shield(task), True
+
+        task = asyncio.create_task(self._locked(site_id, scan))
+        self._running[site_id] = task
+        task.add_done_callback(lambda _: self._running.pop(site_id, None))
+        return await asyncio.shield(task), False
+
+    async def _locked(self, site_id: str, scan: Callable[[], Awaitable[dict]]) -> dict:
+        async with site_scan_lock(site_id):
+            return await scan()
+
+scan_coordinator = ScanCoordinator()
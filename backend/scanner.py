@@ -1,12 +1,17 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from gsc_service import query_search_analytics, inspect_url
+from analytics_cache import cached_daily_rows, merge_rows
+from metrics_history import ingest_cached_days, history_priority_scores
+from profiling import profiled_coroutine
 from models import Error404, ScanLog, Backlink
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def scan_site_for_404s(user_id: str, site_id: str, site_url: str, db: AsyncIOMotorDatabase):
+@profiled_coroutine("scan")
+async def scan_site_for_404s(user_id: str, site_id: str, site_url: str, db: AsyncIOMotorDatabase, session: AsyncSession = None):
     """
     Scan a site for 404 errors using GSC data
     """
@@ -25,15 +30,29 @@ async def scan_site_for_404s(user_id: str, site_id: str, site_url: str, db: Asyn
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=30)
         
-        # Get all pages with data
-        rows = await query_search_analytics(
-            user_id,
-            db,
-            site_url,
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d"),
-            dimensions=["page"]
-        )
+        # Get all pages with data, reusing cached days when a SQL session is available
+        if session is not None:
+            by_day = await cached_daily_rows(
+                user_id,
+                db,
+                session,
+                site_url,
+                start_date.strftime("%Y-%m-%d"),
+                end_date.strftime("%Y-%m-%d"),
+                dimensions=["page"]
+            )
+            # The same per-day rows feed the metrics history, so trends cost no extra GSC queries
+            await ingest_cached_days(session, site_id, by_day)
+            rows = merge_rows(by_day.values())
+        else:
+            rows = await query_search_analytics(
+                user_id,
+                db,
+                site_url,
+                start_date.strftime("%Y-%m-%d"),
+                end_date.strftime("%Y-%m-%d"),
+                dimensions=["page"]
+            )
         
         errors_collection = db.errors_404
         backlinks_collection = db.backlinks
@@ -55,6 +74,11 @@ async def scan_site_for_404s(user_id: str, site_id: str, site_url: str, db: Asyn
                     "clicks": clicks
                 })
         
+        # Trend-aware scores for URLs with stored history
+        history_scores = {}
+        if session is not None:
+            history_scores = await history_priority_scores(session, site_id, [item["url"] for item in urls_to_inspect])
+        
         # Inspect each URL
         for item in urls_to_inspect[:20]:  # Further limit to 20 to stay within quota
             try:
@@ -86,7 +110,7 @@ async def scan_site_for_404s(user_id: str, site_id: str, site_url: str, db: Asyn
                             url=item["url"],
                             impressions=item["impressions"],
                             clicks=item["clicks"],
-                            priority_score=min(item["impressions"], 100)  # Simple priority based on impressions
+                            priority_score=history_scores.get(item["url"], min(item["impressions"], 100))
                         )
                         
                         await errors_collection.insert_one(error_404.model_dump())
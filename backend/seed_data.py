@@ -0,0 +1,196 @@
+"""
+Synthetic large-tenant data generator.
+
+Bulk-inserts users, sites, errors, backlinks and recommendations into the
+database configured by DATABASE_URL (Postgres, or sqlite:///path.db as a
+local stand-in) and writes a manifest of ids that load_test.py uses to pick
+realistic request targets.
+
+    DATABASE_URL=sqlite:///./load.db python seed_data.py --users 20 --errors 1000000
+"""
+from sqlalchemy import insert
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+
+from database import engine, async_session
+from migrations import migrate
+from models import UserDB, SiteDB, Error404DB, BacklinkDB, RecommendationDB
+
+STATUS_WEIGHTS = {"new": 0.7, "fixed": 0.2, "ignored": 0.1}
+PATH_SEGMENTS = ["blog", "products", "category", "news", "docs", "help", "landing", "archive", "tag", "author"]
+REFERRING_DOMAINS = [f"https://referrer{i}.example" for i in range(500)]
+MANIFEST_SAMPLE = 1000
+
+def allocate(total: int, weights: list) -> list:
+    """Split total into integer shares proportional to weights"""
+    scale = total / sum(weights)
+    shares = [int(w * scale) for w in weights]
+    for i in range(total - sum(shares)):
+        shares[i % len(shares)] += 1
+    return shares
+
+class Generator:
+    def __init__(self, rng: random.Random, backlinks_mean: float, recommendation_ratio: float,
+                 zero_backlink_ratio: float = 0.6):
+        self.rng = rng
+        self.backlinks_mean = backlinks_mean
+        self.zero_backlink_ratio = zero_backlink_ratio
+        self.recommendation_ratio = recommendation_ratio
+        self.statuses = list(STATUS_WEIGHTS)
+        self.status_weights = list(STATUS_WEIGHTS.values())
+        self.now = datetime.utcnow()
+
+    def error(self, site_id: str, site_url: str, index: int) -> dict:
+        rng = self.rng
+        # Search traffic is heavy-tailed: most dead URLs get a handful of impressions, a few get thousands
+        impressions = int(rng.lognormvariate(3.0, 1.6))
+        clicks = sum(1 for _ in range(min(impressions, 200)) if rng.random() < 0.02)
+        backlink_count = self.backlink_count()
+        detected_at = self.now - timedelta(days=rng.uniform(0, 365))
+        path = "/".join(rng.choice(PATH_SEGMENTS) for _ in range(rng.randint(1, 3)))
+        return {
+            "id": str(uuid.uuid4()),
+            "site_id": site_id,
+            "url": f"{site_url}/{path}/{index}",
+            "backlink_count": backlink_count,
+            "priority_score": min(100, int(math.log10(1 + impressions) * 25 + min(backlink_count, 50))),
+            "status": rng.choices(self.statuses, self.status_weights)[0],
+            "detected_at": detected_at,
+            "last_checked": detected_at + timedelta(days=rng.uniform(0, (self.now - detected_at).days)),
+            "impressions": impressions,
+            "clicks": clicks,
+        }
+
+    def backlink_count(self) -> int:
+        """Zero-inflated heavy tail: most dead URLs have no referrers, a few have thousands"""
+        rng = self.rng
+        if rng.random() < self.zero_backlink_ratio:
+            return 0
+        # Pareto(1.3) has mean 1.3 / 0.3; dividing by the linked share keeps the overall average on target.
+        # The 5000 cap and the slowly converging tail leave samples a little below it
+        scale = self.backlinks_mean * 0.3 / 1.3 / (1 - self.zero_backlink_ratio)
+        return max(1, min(round(rng.paretovariate(1.3) * scale), 5000))
+
+    def backlinks(self, error: dict) -> list:
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "error_id": error["id"],
+                "source_url": f"{self.rng.choice(REFERRING_DOMAINS)}/post/{self.rng.randint(1, 100000)}",
+                "anchor_text": self.rng.choice([None, "read more", "this guide", error["url"].rsplit("/", 2)[-2]]),
+                "discovered_at": error["detected_at"],
+            }
+            for _ in range(error["backlink_count"])
+        ]
+
+    def recommendation(self, error: dict):
+        if self.rng.random() >= self.recommendation_ratio:
+            return None
+        target = error["url"].rsplit("/", 1)[0]
+        return {
+            "id": str(uuid.uuid4()),
+            "error_id": error["id"],
+            "redirect_target": target,
+            "redirect_reason": "Closest surviving parent section for the removed page",
+            "content_suggestion": "Recreate a concise landing page that links to the replacement content.",
+            "generated_at": error["last_checked"],
+        }
+
+async def seed(args) -> dict:
+    rng = random.Random(args.seed)
+    generator = Generator(rng, args.backlinks_mean, args.recommendation_ratio, args.zero_backlink_ratio)
+    manifest = {"users": [], "sites": [], "errors": []}
+
+    await migrate(engine)
+
+    users = [{"id": str(uuid.uuid4()), "email": f"loadtest-{i}-{rng.getrandbits(32):08x}@example.com", "google_id": "loadtest"}
+             for i in range(args.users)]
+    sites = []
+    for user in users:
+        for j in range(args.sites_per_user):
+            sites.append({
+                "id": str(uuid.uuid4()), "user_id": user["id"],
+                "site_url": f"https://site{j}.{user['id'][:8]}.example",
+                "permission_level": "owner", "last_scan": generator.now
+            })
+
+    async with async_session() as session:
+        await session.execute(insert(UserDB), users)
+        await session.execute(insert(SiteDB), sites)
+        await session.commit()
+
+    manifest["users"] = [u["id"] for u in users]
+    manifest["sites"] = [{"id": s["id"], "user_id": s["user_id"]} for s in sites]
+
+    # A few tenants own most of the errors
+    per_site = allocate(args.errors, [rng.paretovariate(1.2) for _ in sites])
+
+    started = time.perf_counter()
+    inserted = {"errors": 0, "backlinks": 0, "recommendations": 0}
+    seen = 0
+    for site, count in zip(sites, per_site):
+        for batch_start in range(0, count, args.batch_size):
+            errors = [generator.error(site["id"], site["site_url"], i)
+                      for i in range(batch_start, min(count, batch_start + args.batch_size))]
+            backlinks = [b for e in errors for b in generator.backlinks(e)]
+            recommendations = [r for r in (generator.recommendation(e) for e in errors) if r]
+
+            async with async_session() as session:
+                await session.execute(insert(Error404DB), errors)
+                if backlinks:
+                    await session.execute(insert(BacklinkDB), backlinks)
+                if recommendations:
+                    await session.execute(insert(RecommendationDB), recommendations)
+                await session.commit()
+
+            for error in errors:
+                # Reservoir sample of error ids for detail requests
+                seen += 1
+                entry = {"id": error["id"], "user_id": site["user_id"]}
+                if len(manifest["errors"]) < MANIFEST_SAMPLE:
+                    manifest["errors"].append(entry)
+                elif rng.random() < MANIFEST_SAMPLE / seen:
+                    manifest["errors"][rng.randrange(MANIFEST_SAMPLE)] = entry
+
+            inserted["errors"] += len(errors)
+            inserted["backlinks"] += len(backlinks)
+            inserted["recommendations"] += len(recommendations)
+            elapsed = time.perf_counter() - started
+            print(f"\r{inserted['errors']:>10} errors  {inserted['backlinks']:>10} backlinks  "
+                  f"{inserted['errors'] / elapsed:>8.0f} errors/s", end="", flush=True)
+
+    print()
+    return {"manifest": manifest, "inserted": inserted}
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Bulk-generate synthetic tenants for load testing")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--sites-per-user", type=int, default=3)
+    parser.add_argument("--errors", type=int, default=100000, help="total errors across all sites")
+    parser.add_argument("--backlinks-mean", type=float, default=3.0, help="target average backlinks per error; heavy-tailed, so samples come out slightly lower")
+    parser.add_argument("--zero-backlink-ratio", type=float, default=0.6, help="share of errors with no backlinks at all")
+    parser.add_argument("--recommendation-ratio", type=float, default=0.3)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=404)
+    parser.add_argument("--manifest", default="loadtest_manifest.json")
+    return parser
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if not 0 <= args.zero_backlink_ratio < 1:
+        parser.error("--zero-backlink-ratio must be in [0, 1)")
+
+    result = asyncio.run(seed(args))
+    with open(args.manifest, "w") as f:
+        json.dump(result["manifest"], f)
+    print(f"Inserted {result['inserted']}; manifest written to {args.manifest}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, Response
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, update
@@ -11,14 +11,26 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Optional
 import uuid
+import asyncio
+import hmac
+import csv
+import io
+import json
 
-from database import get_db, init_db, engine, Base
+from database import get_db, get_read_db, read_sessionmaker, init_db, async_session, pool_metrics, ReadYourWritesMiddleware
+from config import settings
+from retention import run_archiver_periodically
+from scan_lock import scan_coordinator
+from profiling import ProfilingMiddleware, profiled_coroutine, token_matches, CPU_SCOPE
 from models import (
     UserDB, SiteDB, Error404DB, BacklinkDB, RecommendationDB, ScanLogDB,
-    SiteCreate, Error404Update, ScanTrigger
+    ArchivedError404DB, ArchivedBacklinkDB, ArchivedRecommendationDB, ArchiveSummaryDB, RequestProfileDB,
+    ERROR_STATUSES, SiteCreate, Error404Update, Error404BulkUpdate, ScanTrigger
 )
 from auth_handler import create_access_token, get_current_user
 from ai_service import generate_redirect_recommendation, generate_content_suggestion
+from metrics_history import history_priority_scores
+from events import get_broker, user_channel, publish_user_event, format_sse
 
 logging.basicConfig(
     level=logging.INFO,
@@ -26,12 +38,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+SSE_KEEPALIVE_SECONDS = 15
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_COLUMNS = [
+    "id", "site_url", "url", "status", "priority_score", "backlink_count", "impressions", "clicks",
+    "detected_at", "last_checked", "backlinks", "redirect_target", "redirect_reason", "content_suggestion"
+]
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Database tables created")
+    version = await init_db()
+    logger.info(f"Database schema at version {version}")
+    
+    archiver = None
+    if settings.archive_interval_minutes > 0:
+        archiver = asyncio.create_task(run_archiver_periodically(async_session, settings.archive_interval_minutes))
     yield
+    if archiver:
+        archiver.cancel()
 
 app = FastAPI(lifespan=lifespan, title="404 Recovery & Backlink Retention Tool")
 api_router = APIRouter(prefix="/api")
@@ -87,7 +112,7 @@ async def logout():
     return response
 
 @api_router.get("/sites")
-async def list_sites(request: Request, db: AsyncSession = Depends(get_db)):
+async def list_sites(request: Request, db: AsyncSession = Depends(get_read_db)):
     current_user = await get_current_user(request)
     result = await db.execute(select(SiteDB).where(SiteDB.user_id == current_user["sub"]))
     sites = result.scalars().all()
@@ -115,6 +140,94 @@ async def create_site(site_data: SiteCreate, request: Request, db: AsyncSession
     
     return {"message": "Site added successfully", "site": {"id": site.id, "site_url": site.site_url}}
 
+@profiled_coroutine("scan")
+async def run_site_scan(site_id: str, user_id: str, requested_at: datetime) -> dict:
+    """Scan a site and record it in scan_logs; runs under the per-site scan lock"""
+    async with async_session() as db:
+        # Another worker may have finished a scan while this one waited for the lock
+        recent_result = await db.execute(
+            select(ScanLogDB)
+            .where(ScanLogDB.site_id == site_id, ScanLogDB.status == "completed", ScanLogDB.completed_at >= requested_at)
+            .order_by(ScanLogDB.completed_at.desc())
+            .limit(1)
+        )
+        recent = recent_result.scalar_one_or_none()
+        if recent:
+            return {"errors_found": recent.errors_found, "scan_id": recent.id, "coalesced": True}
+        
+        site = await db.get(SiteDB, site_id)
+        scan_log = ScanLogDB(id=str(uuid.uuid4()), site_id=site_id, scan_type="manual", status="running")
+        db.add(scan_log)
+        await db.commit()
+        
+        await publish_user_event(user_id, "scan_progress", {"site_id": site_id, "stage": "started"})
+        
+        try:
+            sample_errors = [
+                {"url": f"{site.site_url}/old-product-page", "backlink_count": 5, "priority_score": 75, "impressions": 150},
+                {"url": f"{site.site_url}/deleted-blog-post", "backlink_count": 12, "priority_score": 90, "impressions": 450},
+                {"url": f"{site.site_url}/missing-category", "backlink_count": 3, "priority_score": 60, "impressions": 80},
+            ]
+            
+            # Prefer trend-aware scores wherever daily history has been ingested
+            history_scores = await history_priority_scores(db, site_id, [e["url"] for e in sample_errors])
+            for err_data in sample_errors:
+                if err_data["url"] in history_scores:
+                    err_data["priority_score"] = history_scores[err_data["url"]]
+            
+            # Archived errors were already resolved; detecting them again must not bring them back as new
+            urls = [e["url"] for e in sample_errors]
+            known_urls = set()
+            for table in (Error404DB, ArchivedError404DB):
+                known_result = await db.execute(select(table.url).where(table.site_id == site_id, table.url.in_(urls)))
+                known_urls.update(known_result.scalars().all())
+            
+            errors_inserted = 0
+            new_errors = []
+            for err_data in sample_errors:
+                if err_data["url"] not in known_urls:
+                    error = Error404DB(
+                        id=str(uuid.uuid4()),
+                        site_id=site_id,
+                        url=err_data["url"],
+                        backlink_count=err_data["backlink_count"],
+                        priority_score=err_data["priority_score"],
+                        impressions=err_data["impressions"]
+                    )
+                    db.add(error)
+                    new_errors.append(error)
+                    errors_inserted += 1
+            
+            site.last_scan = datetime.utcnow()
+            scan_log.status = "completed"
+            scan_log.errors_found = errors_inserted
+            scan_log.completed_at = site.last_scan
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Scan failed for site {site_id}: {e}")
+            await db.rollback()
+            scan_log.status = "failed"
+            scan_log.error_message = str(e)
+            scan_log.completed_at = datetime.utcnow()
+            await db.commit()
+            await publish_user_event(user_id, "scan_progress", {"site_id": site_id, "stage": "failed"})
+            raise
+    
+    for error in new_errors:
+        await publish_user_event(user_id, "error_found", {
+            "id": error.id, "site_id": error.site_id, "url": error.url,
+            "backlink_count": error.backlink_count, "priority_score": error.priority_score,
+            "status": error.status, "impressions": error.impressions, "clicks": error.clicks
+        })
+    if new_errors:
+        await publish_user_stats(user_id)
+    await publish_user_event(user_id, "scan_progress", {
+        "site_id": site_id, "stage": "completed",
+        "errors_found": errors_inserted, "last_scan": site.last_scan
+    })
+    
+    return {"errors_found": errors_inserted, "scan_id": scan_log.id, "coalesced": False}
+
 @api_router.post("/sites/{site_id}/scan")
 async def trigger_scan(site_id: str, request: Request, db: AsyncSession = Depends(get_db)):
     current_user = await get_current_user(request)
@@ -127,36 +240,30 @@ async def trigger_scan(site_id: str, request: Request, db: AsyncSession = Depend
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
     
-    sample_errors = [
-        {"url": f"{site.site_url}/old-product-page", "backlink_count": 5, "priority_score": 75, "impressions": 150},
-        {"url": f"{site.site_url}/deleted-blog-post", "backlink_count": 12, "priority_score": 90, "impressions": 450},
-        {"url": f"{site.site_url}/missing-category", "backlink_count": 3, "priority_score": 60, "impressions": 80},
-    ]
-    
-    errors_inserted = 0
-    for err_data in sample_errors:
-        result = await db.execute(
-            select(Error404DB).where(Error404DB.site_id == site_id, Error404DB.url == err_data["url"])
-        )
-        if not result.scalar_one_or_none():
-            error = Error404DB(
-                id=str(uuid.uuid4()),
-                site_id=site_id,
-                url=err_data["url"],
-                backlink_count=err_data["backlink_count"],
-                priority_score=err_data["priority_score"],
-                impressions=err_data["impressions"]
+    requested_at = datetime.utcnow()
+    # A scan already in progress is joined rather than rejected, whatever its age
+    if site.last_scan and not scan_coordinator.is_running(site_id):
+        retry_after = settings.min_rescan_interval_seconds - (requested_at - site.last_scan).total_seconds()
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Site was scanned recently",
+                headers={"Retry-After": str(int(retry_after) + 1)}
             )
-            db.add(error)
-            errors_inserted += 1
     
-    site.last_scan = datetime.utcnow()
-    await db.commit()
+    scan_result, coalesced = await scan_coordinator.run(
+        site_id, lambda: run_site_scan(site_id, current_user["sub"], requested_at)
+    )
     
-    return {"message": "Scan completed", "errors_found": errors_inserted}
+    return {
+        "message": "Scan completed",
+        "errors_found": scan_result["errors_found"],
+        "scan_id": scan_result["scan_id"],
+        "coalesced": coalesced or scan_result["coalesced"]
+    }
 
 @api_router.get("/errors")
-async def list_errors(request: Request, site_id: Optional[str] = None, status: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+async def list_errors(request: Request, site_id: Optional[str] = None, status: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
     current_user = await get_current_user(request)
     
     query = select(Error404DB).join(SiteDB).where(SiteDB.user_id == current_user["sub"])
@@ -181,8 +288,155 @@ async def list_errors(request: Request, site_id: Optional[str] = None, status: O
         "count": len(errors)
     }
 
+async def iter_export_records(session_factory, user_id: str, site_id: Optional[str], status: Optional[str]):
+    """Yield one record per error, folding its joined backlink rows together"""
+    query = (
+        select(
+            Error404DB.id, SiteDB.site_url, Error404DB.url, Error404DB.status, Error404DB.priority_score,
+            Error404DB.backlink_count, Error404DB.impressions, Error404DB.clicks,
+            Error404DB.detected_at, Error404DB.last_checked,
+            BacklinkDB.source_url, BacklinkDB.anchor_text,
+            RecommendationDB.redirect_target, RecommendationDB.redirect_reason, RecommendationDB.content_suggestion
+        )
+        .join(SiteDB, Error404DB.site_id == SiteDB.id)
+        .outerjoin(BacklinkDB, BacklinkDB.error_id == Error404DB.id)
+        .outerjoin(RecommendationDB, RecommendationDB.error_id == Error404DB.id)
+        .where(SiteDB.user_id == user_id)
+    )
+    if site_id:
+        query = query.where(Error404DB.site_id == site_id)
+    if status:
+        query = query.where(Error404DB.status == status)
+    # Rows of the same error must be adjacent so they can be merged while streaming. Ordering by the
+    # primary key alone lets the database walk the index instead of sorting the whole join first
+    query = query.order_by(Error404DB.id)
+    
+    # A dedicated session: request-scoped dependencies are closed before the body is streamed
+    async with session_factory() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        record = None
+        async for row in result:
+            if record is None or record["id"] != row.id:
+                if record is not None:
+                    yield record
+                record = {
+                    "id": row.id, "site_url": row.site_url, "url": row.url, "status": row.status,
+                    "priority_score": row.priority_score, "backlink_count": row.backlink_count,
+                    "impressions": row.impressions, "clicks": row.clicks,
+                    "detected_at": row.detected_at, "last_checked": row.last_checked,
+                    "backlinks": [],
+                    "redirect_target": row.redirect_target, "redirect_reason": row.redirect_reason,
+                    "content_suggestion": row.content_suggestion
+                }
+            if row.source_url is not None:
+                record["backlinks"].append({"source_url": row.source_url, "anchor_text": row.anchor_text})
+        if record is not None:
+            yield record
+
+async def export_ndjson(records):
+    async for record in records:
+        yield json.dumps(record, default=str) + "\n"
+
+async def export_csv(records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    
+    buffered = 0
+    buffer.seek(0)
+    buffer.truncate()
+    async for record in records:
+        record["backlinks"] = " | ".join(b["source_url"] for b in record["backlinks"])
+        writer.writerow([record[column] for column in EXPORT_COLUMNS])
+        buffered += 1
+        if buffered >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            buffered = 0
+    if buffered:
+        yield buffer.getvalue()
+
+@api_router.get("/errors/export")
+async def export_errors(request: Request, format: str = "csv", site_id: Optional[str] = None, status: Optional[str] = None):
+    """Stream all matching errors with their backlinks and recommendation as CSV or NDJSON"""
+    current_user = await get_current_user(request)
+    
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Unsupported export format")
+    
+    records = iter_export_records(read_sessionmaker(request), current_user["sub"], site_id, status)
+    filename = f"errors-{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    
+    if format == "csv":
+        return StreamingResponse(export_csv(records), media_type="text/csv", headers=headers)
+    return StreamingResponse(export_ndjson(records), media_type="application/x-ndjson", headers=headers)
+
+@api_router.get("/errors/archive")
+async def list_archived_errors(request: Request, site_id: Optional[str] = None, status: Optional[str] = None,
+                               limit: int = 100, offset: int = 0, db: AsyncSession = Depends(get_read_db)):
+    """Resolved errors moved out of the live table, for historical reports"""
+    current_user = await get_current_user(request)
+    
+    query = select(ArchivedError404DB).join(SiteDB).where(SiteDB.user_id == current_user["sub"])
+    if site_id:
+        query = query.where(ArchivedError404DB.site_id == site_id)
+    if status:
+        query = query.where(ArchivedError404DB.status == status)
+    
+    query = query.order_by(ArchivedError404DB.archived_at.desc(), ArchivedError404DB.id)
+    result = await db.execute(query.limit(min(limit, 1000)).offset(offset))
+    errors = result.scalars().all()
+    
+    return {
+        "errors": [
+            {
+                "id": e.id, "site_id": e.site_id, "url": e.url,
+                "backlink_count": e.backlink_count, "priority_score": e.priority_score,
+                "status": e.status, "impressions": e.impressions, "clicks": e.clicks,
+                "detected_at": e.detected_at, "last_checked": e.last_checked, "archived_at": e.archived_at
+            } for e in errors
+        ],
+        "count": len(errors)
+    }
+
+@api_router.get("/errors/archive/{error_id}")
+async def get_archived_error_details(error_id: str, request: Request, db: AsyncSession = Depends(get_read_db)):
+    current_user = await get_current_user(request)
+    
+    result = await db.execute(
+        select(ArchivedError404DB, SiteDB).join(SiteDB)
+        .where(ArchivedError404DB.id == error_id, SiteDB.user_id == current_user["sub"])
+    )
+    row = result.one_or_none()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Error not found")
+    error, site = row
+    
+    backlinks_result = await db.execute(select(ArchivedBacklinkDB).where(ArchivedBacklinkDB.error_id == error_id))
+    rec_result = await db.execute(select(ArchivedRecommendationDB).where(ArchivedRecommendationDB.error_id == error_id))
+    recommendation = rec_result.scalar_one_or_none()
+    
+    return {
+        "error": {
+            "id": error.id, "site_id": error.site_id, "url": error.url,
+            "backlink_count": error.backlink_count, "priority_score": error.priority_score,
+            "status": error.status, "archived_at": error.archived_at
+        },
+        "site": {"id": site.id, "site_url": site.site_url},
+        "backlinks": [{"id": b.id, "source_url": b.source_url, "anchor_text": b.anchor_text} for b in backlinks_result.scalars().all()],
+        "recommendation": {
+            "redirect_target": recommendation.redirect_target,
+            "redirect_reason": recommendation.redirect_reason,
+            "content_suggestion": recommendation.content_suggestion
+        } if recommendation else None
+    }
+
 @api_router.get("/errors/{error_id}")
-async def get_error_details(error_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+async def get_error_details(error_id: str, request: Request, db: AsyncSession = Depends(get_read_db)):
     current_user = await get_current_user(request)
     
     result = await db.execute(
@@ -258,6 +512,11 @@ async def generate_recommendations(error_id: str, request: Request, db: AsyncSes
     
     await db.commit()
     
+    await publish_user_event(current_user["sub"], "recommendation_ready", {
+        "error_id": error_id, "site_id": error.site_id,
+        "redirect_target": redirect_rec.get("redirect_target")
+    })
+    
     return {"recommendation": {
         "redirect_target": redirect_rec.get("redirect_target"),
         "redirect_reason": redirect_rec.get("reason"),
@@ -280,17 +539,81 @@ async def update_error_status(error_id: str, update_data: Error404Update, reques
     if not site_result.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="Unauthorized")
     
+    changed = error.status != update_data.status
     error.status = update_data.status
     error.last_checked = datetime.utcnow()
     await db.commit()
     
+    await publish_user_event(current_user["sub"], "error_updated", {
+        "id": error.id, "site_id": error.site_id, "status": error.status
+    })
+    if changed:
+        await publish_user_stats(current_user["sub"])
+    
     return {"message": "Error status updated", "status": update_data.status}
 
-@api_router.get("/dashboard/stats")
-async def get_dashboard_stats(request: Request, db: AsyncSession = Depends(get_db)):
+@api_router.patch("/errors")
+async def bulk_update_error_status(update_data: Error404BulkUpdate, request: Request, db: AsyncSession = Depends(get_db)):
+    """Set the status of every owned error matching the given ids and/or filters in one UPDATE"""
     current_user = await get_current_user(request)
     
-    sites_result = await db.execute(select(SiteDB).where(SiteDB.user_id == current_user["sub"]))
+    selectors = (
+        update_data.ids, update_data.site_id, update_data.current_status,
+        update_data.min_priority, update_data.max_priority, update_data.url_prefix
+    )
+    if all(selector is None for selector in selectors):
+        raise HTTPException(status_code=400, detail="Provide ids or at least one filter")
+    # A typo here would rewrite every matched row, so unknown statuses are rejected up front
+    for value in (update_data.status, update_data.current_status):
+        if value is not None and value not in ERROR_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Status must be one of: {', '.join(ERROR_STATUSES)}")
+    
+    filters = [Error404DB.site_id.in_(select(SiteDB.id).where(SiteDB.user_id == current_user["sub"]))]
+    if update_data.ids is not None:
+        filters.append(Error404DB.id.in_(update_data.ids))
+    if update_data.site_id is not None:
+        filters.append(Error404DB.site_id == update_data.site_id)
+    if update_data.current_status is not None:
+        filters.append(Error404DB.status == update_data.current_status)
+    if update_data.min_priority is not None:
+        filters.append(Error404DB.priority_score >= update_data.min_priority)
+    if update_data.max_priority is not None:
+        filters.append(Error404DB.priority_score <= update_data.max_priority)
+    if update_data.url_prefix is not None:
+        filters.append(Error404DB.url.startswith(update_data.url_prefix, autoescape=True))
+    
+    # Lock the matched rows while counting their previous statuses, so nothing changes them before the
+    # single UPDATE below and previous_statuses agrees with what it writes
+    filters.append(Error404DB.status != update_data.status)
+    locked = select(Error404DB.status).where(*filters).with_for_update().subquery()
+    counts_result = await db.execute(select(locked.c.status, func.count()).group_by(locked.c.status))
+    previous_counts = dict(counts_result.all())
+    
+    result = await db.execute(
+        update(Error404DB)
+        .where(*filters)
+        .values(status=update_data.status, last_checked=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    updated = result.rowcount
+    
+    await publish_user_event(current_user["sub"], "errors_bulk_updated", {
+        "status": update_data.status, "updated": updated,
+        "site_id": update_data.site_id
+    })
+    if updated:
+        await publish_user_stats(current_user["sub"])
+    
+    return {
+        "message": "Error statuses updated",
+        "status": update_data.status,
+        "updated": updated,
+        "previous_statuses": previous_counts
+    }
+
+async def dashboard_stats(db: AsyncSession, user_id: str) -> dict:
+    sites_result = await db.execute(select(SiteDB).where(SiteDB.user_id == user_id))
     sites = sites_result.scalars().all()
     site_ids = [s.id for s in sites]
     
@@ -320,6 +643,17 @@ async def get_dashboard_stats(request: Request, db: AsyncSession = Depends(get_d
     )
     backlinks_affected = backlinks_result.scalar() or 0
     
+    # Archived errors are all resolved; fold them in from the summary so totals don't drop when rows move out
+    archived_result = await db.execute(
+        select(ArchiveSummaryDB.status, ArchiveSummaryDB.error_count, ArchiveSummaryDB.backlink_count)
+        .where(ArchiveSummaryDB.site_id.in_(site_ids))
+    )
+    for archived_status, archived_count, archived_backlinks in archived_result.all():
+        total_errors += archived_count
+        backlinks_affected += archived_backlinks
+        if archived_status == "fixed":
+            fixed_errors += archived_count
+    
     return {
         "sites_count": len(sites),
         "total_errors": total_errors,
@@ -329,12 +663,115 @@ async def get_dashboard_stats(request: Request, db: AsyncSession = Depends(get_d
         "recent_scans": []
     }
 
+@api_router.get("/dashboard/stats")
+async def get_dashboard_stats(request: Request, db: AsyncSession = Depends(get_read_db)):
+    current_user = await get_current_user(request)
+    return await dashboard_stats(db, current_user["sub"])
+
+async def publish_user_stats(user_id: str):
+    """Push absolute dashboard counters, so clients never apply a change twice after refetching"""
+    async with async_session() as db:
+        stats = await dashboard_stats(db, user_id)
+    await publish_user_event(user_id, "stats", stats)
+
+@api_router.get("/events")
+async def stream_events(request: Request, site_id: Optional[str] = None):
+    """Server-Sent Events stream of scan progress, new errors and dashboard counters"""
+    current_user = await get_current_user(request)
+    subscription = get_broker().subscribe(user_channel(current_user["sub"]))
+    
+    async def event_stream():
+        try:
+            yield format_sse("connected", {"user_id": current_user["sub"]})
+            while not await request.is_disconnected():
+                message = await subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                if site_id and message["data"].get("site_id") not in (None, site_id):
+                    continue
+                yield format_sse(message["event"], message["data"])
+        except asyncio.CancelledError:
+            pass
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def require_profiling_token(request: Request):
+    if not token_matches(request.headers.get("x-profile-token")):
+        raise HTTPException(status_code=404, detail="Not found")
+
+@api_router.get("/profiles", dependencies=[Depends(require_profiling_token)])
+async def list_profiles(kind: Optional[str] = None, limit: int = 50, db: AsyncSession = Depends(get_db)):
+    query = select(
+        RequestProfileDB.id, RequestProfileDB.kind, RequestProfileDB.name,
+        RequestProfileDB.started_at, RequestProfileDB.duration_ms, RequestProfileDB.concurrent_requests
+    )
+    if kind:
+        query = query.where(RequestProfileDB.kind == kind)
+    result = await db.execute(query.order_by(RequestProfileDB.started_at.desc()).limit(min(limit, 500)))
+    
+    return {"profiles": [dict(row._mapping) for row in result.all()]}
+
+@api_router.get("/profiles/{profile_id}", dependencies=[Depends(require_profiling_token)])
+async def get_profile(profile_id: str, db: AsyncSession = Depends(get_db)):
+    profile = await db.get(RequestProfileDB, profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return {
+        "id": profile.id, "kind": profile.kind, "name": profile.name,
+        "started_at": profile.started_at, "duration_ms": profile.duration_ms,
+        # cProfile hooks the whole event loop: with other requests in flight, the CPU
+        # figures include their work too; SQL and spans belong to this profile alone
+        "cpu_scope": CPU_SCOPE,
+        "concurrent_requests": profile.concurrent_requests,
+        "top_functions": json.loads(profile.top_functions),
+        "sql": json.loads(profile.sql_timings),
+        "spans": json.loads(profile.spans)
+    }
+
+@api_router.get("/profiles/{profile_id}/download", dependencies=[Depends(require_profiling_token)])
+async def download_profile(profile_id: str, db: AsyncSession = Depends(get_db)):
+    """Raw cProfile stats for the whole event loop, loadable with pstats or snakeviz"""
+    profile = await db.get(RequestProfileDB, profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return Response(
+        content=profile.stats,
+        media_type="application/octet-stream",
+        headers={
+            "Content-Disposition": f'attachment; filename="{profile.id}.{CPU_SCOPE}.prof"',
+            "X-Profile-Scope": CPU_SCOPE,
+            "X-Concurrent-Requests": str(profile.concurrent_requests),
+        }
+    )
+
+def require_metrics_token(request: Request):
+    token = request.headers.get("x-metrics-token")
+    if not (settings.metrics_token and token is not None and hmac.compare_digest(token, settings.metrics_token)):
+        raise HTTPException(status_code=404, detail="Not found")
+
+@api_router.get("/health/db", dependencies=[Depends(require_metrics_token)])
+async def database_health():
+    """Connection pool utilization and read routing counters for monitoring"""
+    return pool_metrics()
+
 @api_router.get("/")
 async def root():
     return {"message": "404 Recovery & Backlink Retention API", "version": "1.0.0", "status": "running"}
 
 app.include_router(api_router)
 
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
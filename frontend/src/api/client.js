@@ -25,11 +25,25 @@ export const errors = {
   list: (params) => apiClient.get('/errors', { params }),
   getDetails: (errorId) => apiClient.get(`/errors/${errorId}`),
   generateRecommendations: (errorId) => apiClient.post(`/errors/${errorId}/generate-recommendations`),
-  updateStatus: (errorId, status) => apiClient.patch(`/errors/${errorId}`, { status })
+  updateStatus: (errorId, status) => apiClient.patch(`/errors/${errorId}`, { status }),
+  bulkUpdateStatus: (status, selection) => apiClient.patch('/errors', { status, ...selection }),
+  // Streamed download; open directly instead of buffering through axios
+  exportUrl: (params) => `/api/errors/export?${new URLSearchParams(params)}`
 };
 
 export const dashboard = {
   getStats: () => apiClient.get('/dashboard/stats')
 };
 
+export const events = {
+  // Server-pushed scan progress and counter updates; returns an unsubscribe function
+  subscribe: (handlers) => {
+    const source = new EventSource('/api/events', { withCredentials: true });
+    Object.entries(handlers).forEach(([event, handler]) => {
+      source.addEventListener(event, (message) => handler(JSON.parse(message.data)));
+    });
+    return () => source.close();
+  }
+};
+
 export default apiClient;
\ No newline at end of file
@@ -47,7 +47,7 @@ export const ErrorDetailModal = ({ error, open, onClose, onUpdate }) => {
     setUpdating(true);
     try {
       await errorsApi.updateStatus(error.id, 'fixed');
-      onUpdate();
+      onUpdate?.();
       onClose();
     } catch (err) {
       console.error('Failed to update status:', err);
@@ -60,7 +60,7 @@ export const ErrorDetailModal = ({ error, open, onClose, onUpdate }) => {
     setUpdating(true);
     try {
       await errorsApi.updateStatus(error.id, 'ignored');
-      onUpdate();
+      onUpdate?.();
       onClose();
     } catch (err) {
       console.error('Failed to update status:', err);
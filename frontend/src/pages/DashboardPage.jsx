@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { dashboard, sites, errors as errorsApi } from '@/api/client';
+import { dashboard, sites, errors as errorsApi, events } from '@/api/client';
 import { useAuth } from '@/context/AuthContext';
 import { Button } from '@/components/ui/button';
 import { Card, CardHeader, CardTitle, CardContent } from '@/components/ui/card';
@@ -28,6 +28,41 @@ export const DashboardPage = () => {
     loadData();
   }, []);
 
+  useEffect(() => {
+    let connectedBefore = false;
+    return events.subscribe({
+      // Fires on every (re)connect; the mount already loaded once, so only resync after a reconnect
+      connected: () => {
+        if (connectedBefore) loadData();
+        connectedBefore = true;
+      },
+      // Absolute counters, so one arriving after a refetch can't be counted twice
+      stats: (next) => setStats(next),
+      error_found: (error) => {
+        if (error.status !== 'new') return;
+        setErrorsList((prev) => (
+          prev.some((e) => e.id === error.id)
+            ? prev
+            : [...prev, error].sort((a, b) => b.priority_score - a.priority_score)
+        ));
+      },
+      error_updated: (error) => {
+        if (error.status === 'new') return;
+        setErrorsList((prev) => prev.filter((e) => e.id !== error.id));
+      },
+      errors_bulk_updated: async () => {
+        const errorsRes = await errorsApi.list({ status: 'new' });
+        setErrorsList(errorsRes.data.errors);
+      },
+      scan_progress: (progress) => {
+        if (progress.stage !== 'completed') return;
+        setSitesList((prev) => prev.map((s) => (
+          s.id === progress.site_id ? { ...s, last_scan: progress.last_scan } : s
+        )));
+      }
+    });
+  }, []);
+
   const loadData = async () => {
     try {
       const [statsRes, sitesRes, errorsRes] = await Promise.all([
@@ -63,6 +98,7 @@ export const DashboardPage = () => {
     setScanning(true);
     try {
       await sites.scan(siteId);
+      // The in-process broker only reaches streams on the worker that ran the scan
       await loadData();
     } catch (error) {
       console.error('Scan failed:', error);
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Backend modules use flat imports and read DATABASE_URL when first imported
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+DATABASE_URL = f"sqlite:///{tempfile.mkdtemp(prefix='link-recovery-tests-')}/test.db"
+os.environ["DATABASE_URL"] = DATABASE_URL
+# A "replica" on the same file keeps read routing active without replication lag
+os.environ["DATABASE_REPLICA_URLS"] = DATABASE_URL
+
+import httpx
+import pytest
+
+from auth_handler import create_access_token
+from database import Base, engine, all_engines, async_session
+from migrations import migrate
+from models import UserDB, SiteDB
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def db():
+    """Migrated SQLite database, emptied before each test"""
+    await migrate(engine)
+    async with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
+    yield async_session
+    # Pooled aiosqlite connections are bound to this test's event loop
+    for each in all_engines:
+        await each.dispose()
+
+@pytest.fixture
+def make_site(db):
+    """Create a user owning a site; returns the site id"""
+    async def _make_site(user_id: str = "user-1", site_id: str = "site-1", site_url: str = "https://example.com", **fields):
+        async with async_session() as session:
+            if await session.get(UserDB, user_id) is None:
+                session.add(UserDB(id=user_id, email=f"{user_id}@example.com"))
+            session.add(SiteDB(id=site_id, user_id=user_id, site_url=site_url, permission_level="owner", **fields))
+            await session.commit()
+        return site_id
+    return _make_site
+
+@pytest.fixture
+async def client_for(db):
+    """ASGI clients authenticated as the given user"""
+    from server import app
+
+    clients = []
+    def _client_for(user_id: str = "user-1") -> httpx.AsyncClient:
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+            cookies={"access_token": create_access_token({"sub": user_id})}
+        )
+        clients.append(client)
+        return client
+    yield _client_for
+    for client in clients:
+        await client.aclose()
@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+
+import pytest
+
+import analytics_cache
+import gsc_service
+from analytics_cache import cached_search_analytics, cached_daily_rows
+
+pytestmark = pytest.mark.anyio
+
+SITE_URL = "https://example.com/"
+TODAY = date(2026, 3, 20)
+
+class FakeSearchConsole:
+    """Serves ["page", "date"] rows for two pages and records each query"""
+    def __init__(self):
+        self.calls = []
+
+    async def query(self, user_id, gsc_db, site_url, start_date, end_date, dimensions=None, row_limit=10000, start_row=0):
+        self.calls.append((start_date, end_date, start_row))
+        rows = []
+        day, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        while day <= end:
+            rows.append({"keys": ["/a", day.isoformat()], "clicks": 2, "impressions": 10, "position": 1.0})
+            rows.append({"keys": ["/b", day.isoformat()], "clicks": 0, "impressions": 30, "position": 5.0})
+            day += timedelta(days=1)
+        return rows[start_row:start_row + row_limit]
+
+    def ranges(self) -> list:
+        return sorted({(start, end) for start, end, _ in self.calls})
+
+@pytest.fixture
+def gsc(monkeypatch):
+    fake = FakeSearchConsole()
+    monkeypatch.setattr(gsc_service, "query_search_analytics", fake.query)
+    return fake
+
+async def fetch(db, start: str, end: str, today: date = TODAY) -> list:
+    async with db() as session:
+        return await cached_search_analytics("user-1", None, session, SITE_URL, start, end, dimensions=["page"], today=today)
+
+async def test_merges_days_with_weighted_position(db, gsc):
+    rows = await fetch(db, "2026-03-01", "2026-03-10")
+
+    by_page = {row["keys"][0]: row for row in rows}
+    assert by_page["/a"]["clicks"] == 20
+    assert by_page["/a"]["ctr"] == pytest.approx(0.2)
+    assert by_page["/b"]["impressions"] == 300
+    assert by_page["/b"]["position"] == pytest.approx(5.0)
+    assert [row["keys"][0] for row in rows] == ["/a", "/b"]
+    assert gsc.ranges() == [("2026-03-01", "2026-03-10")]
+
+async def test_final_days_are_served_from_cache(db, gsc):
+    await fetch(db, "2026-03-01", "2026-03-10")
+    gsc.calls.clear()
+
+    await fetch(db, "2026-03-01", "2026-03-10")
+    assert gsc.calls == []
+
+async def test_only_gaps_and_unfinalized_days_are_fetched(db, gsc):
+    await fetch(db, "2026-03-01", "2026-03-03")
+    await fetch(db, "2026-03-07", "2026-03-08")
+    # Days within GSC's revision window are cached but not final
+    await fetch(db, "2026-03-18", "2026-03-19")
+    gsc.calls.clear()
+
+    await fetch(db, "2026-03-01", "2026-03-19")
+    assert gsc.ranges() == [("2026-03-04", "2026-03-06"), ("2026-03-09", "2026-03-19")]
+
+async def test_unfinalized_days_become_final_once_old_enough(db, gsc):
+    await fetch(db, "2026-03-18", "2026-03-19")
+    await fetch(db, "2026-03-18", "2026-03-19", today=TODAY + timedelta(days=5))
+    gsc.calls.clear()
+
+    await fetch(db, "2026-03-18", "2026-03-19", today=TODAY + timedelta(days=6))
+    assert gsc.calls == []
+
+async def test_pages_through_large_ranges(db, gsc, monkeypatch):
+    monkeypatch.setattr(analytics_cache, "GSC_ROW_LIMIT", 3)
+
+    async with db() as session:
+        by_day = await cached_daily_rows("user-1", None, session, SITE_URL, "2026-03-01", "2026-03-04", today=TODAY)
+
+    assert [start_row for _, _, start_row in gsc.calls] == [0, 3, 6]
+    assert all(len(rows) == 2 for rows in by_day.values())
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import select
+
+from events import get_broker, user_channel
+from models import Error404DB
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def errors(db, make_site):
+    await make_site("user-1", "site-1", "https://one.example")
+    await make_site("user-1", "site-2", "https://two.example")
+    await make_site("user-2", "site-3", "https://three.example")
+    rows = [
+        ("a", "site-1", "/blog/a", "new", 90),
+        ("b", "site-1", "/blog/b", "new", 40),
+        ("c", "site-1", "/shop/c", "fixed", 70),
+        ("d", "site-2", "/blog/d", "ignored", 20),
+        ("foreign", "site-3", "/blog/x", "new", 90),
+    ]
+    async with db() as session:
+        for error_id, site_id, path, status, priority in rows:
+            session.add(Error404DB(id=error_id, site_id=site_id, url=f"https://{site_id}.example{path}",
+                                   status=status, priority_score=priority))
+        await session.commit()
+
+async def statuses(db) -> dict:
+    async with db() as session:
+        return dict((await session.execute(select(Error404DB.id, Error404DB.status))).all())
+
+async def test_updates_only_owned_errors(db, errors, client_for):
+    response = await client_for("user-1").patch("/api/errors", json={"status": "fixed", "ids": ["a", "d", "foreign"]})
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == 2
+    assert response.json()["previous_statuses"] == {"new": 1, "ignored": 1}
+    assert await statuses(db) == {"a": "fixed", "b": "new", "c": "fixed", "d": "fixed", "foreign": "new"}
+
+async def test_filters_combine(db, errors, client_for):
+    response = await client_for("user-1").patch("/api/errors", json={
+        "status": "ignored", "site_id": "site-1", "current_status": "new", "min_priority": 50
+    })
+
+    assert response.json()["updated"] == 1
+    assert (await statuses(db))["a"] == "ignored"
+
+async def test_url_prefix_is_matched_literally(db, errors, client_for):
+    response = await client_for("user-1").patch("/api/errors", json={
+        "status": "fixed", "url_prefix": "https://site-1.example/blog/"
+    })
+    assert response.json()["updated"] == 2
+
+    wildcard = await client_for("user-1").patch("/api/errors", json={"status": "new", "url_prefix": "%"})
+    assert wildcard.json()["updated"] == 0
+
+async def test_rejects_unknown_status_and_missing_selectors(db, errors, client_for):
+    client = client_for("user-1")
+
+    assert (await client.patch("/api/errors", json={"status": "bogus", "site_id": "site-1"})).status_code == 400
+    assert (await client.patch("/api/errors", json={"status": "fixed", "current_status": "done"})).status_code == 400
+    assert (await client.patch("/api/errors", json={"status": "fixed"})).status_code == 400
+    assert (await statuses(db))["a"] == "new"
+
+async def test_publishes_absolute_counters_after_update(db, errors, client_for):
+    subscription = get_broker().subscribe(user_channel("user-1"))
+    try:
+        await client_for("user-1").patch("/api/errors", json={"status": "fixed", "site_id": "site-1"})
+
+        events = {}
+        while not subscription.queue.empty():
+            message = subscription.queue.get_nowait()
+            events[message["event"]] = message["data"]
+    finally:
+        subscription.close()
+
+    assert events["errors_bulk_updated"]["updated"] == 2
+    assert events["stats"]["total_errors"] == 4
+    assert events["stats"]["new_errors"] == 0
+    assert events["stats"]["fixed_errors"] == 3
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import events
+from auth_handler import create_access_token
+from events import InMemoryBroker, format_sse, publish_user_event, user_channel
+from server import stream_events
+
+pytestmark = pytest.mark.anyio
+
+def events_request(user_id: str = None) -> Request:
+    headers = []
+    if user_id:
+        headers.append((b"cookie", f"access_token={create_access_token({'sub': user_id})}".encode()))
+
+    async def receive():
+        # Never disconnects; the test closes the stream itself
+        await asyncio.Event().wait()
+
+    scope = {"type": "http", "method": "GET", "path": "/api/events", "headers": headers, "query_string": b""}
+    return Request(scope, receive)
+
+def parse_sse(frame: str) -> tuple:
+    lines = dict(line.split(": ", 1) for line in frame.strip().splitlines())
+    return lines["event"], json.loads(lines["data"])
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = InMemoryBroker()
+    monkeypatch.setattr(events, "_broker", broker)
+    return broker
+
+async def test_publish_reaches_only_the_channel_subscribers(broker):
+    mine, other = broker.subscribe("user:1"), broker.subscribe("user:2")
+
+    await broker.publish("user:1", "stats", {"new_errors": 3})
+
+    assert await mine.get(timeout=0.1) == {"event": "stats", "data": {"new_errors": 3}}
+    assert await other.get(timeout=0.01) is None
+
+async def test_full_queue_drops_new_events_without_blocking():
+    broker = InMemoryBroker(queue_size=2)
+    slow = broker.subscribe("user:1")
+    for i in range(3):
+        await broker.publish("user:1", "error_found", {"id": i})
+
+    received = [(await slow.get(timeout=0.1))["data"]["id"] for _ in range(2)]
+    assert received == [0, 1]
+    assert await slow.get(timeout=0.01) is None
+
+async def test_unsubscribing_last_listener_removes_channel(broker):
+    first, second = broker.subscribe("user:1"), broker.subscribe("user:1")
+
+    first.close()
+    assert "user:1" in broker._subscribers
+    second.close()
+    assert "user:1" not in broker._subscribers
+    # Closing twice is harmless
+    second.close()
+
+async def test_format_sse_frames_event_and_json_data():
+    assert format_sse("stats", {"new_errors": 1}) == 'event: stats\ndata: {"new_errors": 1}\n\n'
+
+async def test_stream_requires_authentication(broker):
+    with pytest.raises(HTTPException) as exc:
+        await stream_events(events_request())
+    assert exc.value.status_code == 401
+
+async def test_stream_carries_only_the_users_events_for_the_site(broker):
+    response = await stream_events(events_request("user-1"), site_id="site-1")
+    stream = response.body_iterator
+    try:
+        assert parse_sse(await anext(stream)) == ("connected", {"user_id": "user-1"})
+
+        await publish_user_event("user-2", "error_found", {"site_id": "site-1", "id": "foreign"})
+        await publish_user_event("user-1", "scan_progress", {"site_id": "site-2", "stage": "started"})
+        await publish_user_event("user-1", "scan_progress", {"site_id": "site-1", "stage": "started"})
+        # Events without a site apply to every site
+        await publish_user_event("user-1", "stats", {"new_errors": 2})
+
+        assert parse_sse(await anext(stream)) == ("scan_progress", {"site_id": "site-1", "stage": "started"})
+        assert parse_sse(await anext(stream)) == ("stats", {"new_errors": 2})
+    finally:
+        await stream.aclose()
+
+    assert user_channel("user-1") not in broker._subscribers
@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+
+import pytest
+
+import server
+from models import Error404DB, BacklinkDB, RecommendationDB
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def errors(db, make_site):
+    await make_site("user-1", "site-1", "https://one.example")
+    await make_site("user-2", "site-2", "https://two.example")
+    async with db() as session:
+        # Exported in id order, whatever the priority, so each error's joined rows stay adjacent
+        for error_id, status, priority in (("e1", "new", 10), ("e2", "new", 90), ("e3", "fixed", 50)):
+            session.add(Error404DB(id=error_id, site_id="site-1", url=f"https://one.example/{error_id}",
+                                   status=status, priority_score=priority))
+        session.add(Error404DB(id="foreign", site_id="site-2", url="https://two.example/x", priority_score=99))
+        for i in range(3):
+            session.add(BacklinkDB(id=f"e1-b{i}", error_id="e1", source_url=f"https://ref.example/{i}"))
+            session.add(BacklinkDB(id=f"e3-b{i}", error_id="e3", source_url=f"https://other.example/{i}"))
+        session.add(RecommendationDB(id="e1-r", error_id="e1", redirect_target="https://one.example/new"))
+        await session.commit()
+
+async def export(client, **params) -> str:
+    response = await client.get("/api/errors/export", params=params)
+    assert response.status_code == 200
+    return response.text
+
+async def test_ndjson_folds_backlinks_into_one_record_per_error(errors, client_for):
+    lines = (await export(client_for("user-1"), format="ndjson")).splitlines()
+    records = {r["id"]: r for r in map(json.loads, lines)}
+
+    assert len(lines) == 3
+    assert set(records) == {"e1", "e2", "e3"}
+    assert sorted(b["source_url"] for b in records["e1"]["backlinks"]) == [f"https://ref.example/{i}" for i in range(3)]
+    assert records["e1"]["redirect_target"] == "https://one.example/new"
+    assert records["e2"]["backlinks"] == []
+    assert len(records["e3"]["backlinks"]) == 3
+
+async def test_csv_batches_rows_and_joins_backlinks(errors, client_for, monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_BATCH_SIZE", 2)
+    rows = list(csv.DictReader(io.StringIO(await export(client_for("user-1"), format="csv", status="new"))))
+
+    assert [row["id"] for row in rows] == ["e1", "e2"]
+    assert rows[0]["backlinks"].count(" | ") == 2
+    assert rows[1]["backlinks"] == ""
+    assert list(rows[0]) == server.EXPORT_COLUMNS
+
+async def test_other_tenants_errors_are_not_exported(errors, client_for):
+    lines = (await export(client_for("user-2"), format="ndjson")).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["foreign"]
+
+async def test_rejects_unknown_format(errors, client_for):
+    response = await client_for("user-1").get("/api/errors/export", params={"format": "xml"})
+    assert response.status_code == 400
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select, func
+
+from metrics_history import ingest_daily_rows, ingest_cached_days, history_priority_scores, windowed_metrics
+from models import UrlMetricDailyDB
+
+pytestmark = pytest.mark.anyio
+
+AS_OF = date(2026, 3, 28)
+
+def daily_rows(url: str, impressions_by_day: dict) -> list:
+    return [
+        {"keys": [url, day.isoformat()], "impressions": impressions, "clicks": impressions // 10}
+        for day, impressions in impressions_by_day.items()
+    ]
+
+def days_back(start: int, end: int, impressions: int) -> dict:
+    return {AS_OF - timedelta(days=n): impressions for n in range(start, end)}
+
+async def stored_rows(db) -> int:
+    async with db() as session:
+        return (await session.execute(select(func.count()).select_from(UrlMetricDailyDB))).scalar()
+
+async def test_skips_unfinalized_and_already_stored_days(db, make_site):
+    await make_site()
+    today = date(2026, 3, 10)
+    rows = daily_rows("https://example.com/a", {date(2026, 3, d): 10 for d in range(1, 10)})
+
+    async with db() as session:
+        # Days after March 7 are still inside GSC's revision window
+        assert await ingest_daily_rows(session, "site-1", rows, today=today) == 7
+        assert await ingest_daily_rows(session, "site-1", rows, today=today) == 0
+    assert await stored_rows(db) == 7
+
+async def test_lost_traffic_scores_above_steady_traffic(db, make_site):
+    await make_site()
+    baseline = days_back(7, 35, 100)
+    rows = (
+        daily_rows("https://example.com/dropped", {**baseline, **days_back(0, 7, 5)})
+        + daily_rows("https://example.com/steady", {**baseline, **days_back(0, 7, 100)})
+    )
+
+    async with db() as session:
+        await ingest_daily_rows(session, "site-1", rows, today=AS_OF + timedelta(days=3))
+        metrics = await windowed_metrics(session, "site-1", ["https://example.com/dropped"], as_of=AS_OF)
+        scores = await history_priority_scores(
+            session, "site-1", ["https://example.com/dropped", "https://example.com/steady", "https://example.com/unknown"],
+            as_of=AS_OF
+        )
+
+    assert metrics["https://example.com/dropped"]["impressions"] == 35
+    assert metrics["https://example.com/dropped"]["baseline_impressions"] == 700
+    assert set(scores) == {"https://example.com/dropped", "https://example.com/steady"}
+    assert scores["https://example.com/dropped"] > scores["https://example.com/steady"]
+
+async def test_cached_days_are_stored_per_page_and_day(db, make_site):
+    await make_site()
+    by_day = {
+        date(2026, 3, d): [{"keys": [f"https://example.com/{page}"], "impressions": 10, "clicks": 1} for page in "ab"]
+        for d in range(1, 10)
+    }
+
+    async with db() as session:
+        assert await ingest_cached_days(session, "site-1", by_day, today=date(2026, 3, 10)) == 14
+        metrics = await windowed_metrics(session, "site-1", ["https://example.com/a"], as_of=date(2026, 3, 7))
+
+    assert metrics["https://example.com/a"]["impressions"] == 70
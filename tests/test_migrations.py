@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database import Base
+import migrations
+from migrations import MIGRATIONS, migrate, ensure_schema, get_schema_version, latest_version
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def make_engine(tmp_path):
+    engines = []
+    def _make_engine(name: str = "schema.db"):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}")
+        engines.append(engine)
+        return engine
+    yield _make_engine
+    for engine in engines:
+        await engine.dispose()
+
+def describe(conn) -> dict:
+    """Columns, keys and indexes of every application table"""
+    inspector = inspect(conn)
+    schema = {}
+    for table in inspector.get_table_names():
+        if table == "schema_migrations":
+            continue
+        schema[table] = {
+            "columns": sorted((c["name"], str(c["type"]), c["nullable"]) for c in inspector.get_columns(table)),
+            "primary_key": inspector.get_pk_constraint(table)["constrained_columns"],
+            "foreign_keys": sorted((tuple(f["constrained_columns"]), f["referred_table"]) for f in inspector.get_foreign_keys(table)),
+            "indexes": sorted((i["name"], tuple(i["column_names"]), bool(i["unique"])) for i in inspector.get_indexes(table)),
+            "unique": sorted(tuple(u["column_names"]) for u in inspector.get_unique_constraints(table)),
+        }
+    return schema
+
+async def test_migrated_schema_matches_models(make_engine):
+    migrated, reference = make_engine("migrated.db"), make_engine("reference.db")
+
+    assert await migrate(migrated) == latest_version()
+    async with reference.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with migrated.connect() as a, reference.connect() as b:
+        assert await a.run_sync(describe) == await b.run_sync(describe)
+
+async def test_versions_are_unique_and_ordered():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+async def test_migrate_is_idempotent(make_engine):
+    engine = make_engine()
+    await migrate(engine)
+    assert await migrate(engine) == latest_version()
+    assert await get_schema_version(engine) == latest_version()
+
+async def test_adopts_databases_created_before_migrations(make_engine):
+    engine = make_engine()
+    async with engine.begin() as conn:
+        tables = [Base.metadata.tables[name] for name in ("users", "sites", "errors_404", "backlinks", "recommendations", "scan_logs")]
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    assert await get_schema_version(engine) == 0
+    assert await migrate(engine) == latest_version()
+
+async def test_outdated_schema_blocks_startup_without_auto_migrate(make_engine):
+    engine = make_engine()
+    with pytest.raises(RuntimeError, match="run `python migrations.py`"):
+        await ensure_schema(engine, auto_migrate=False)
+
+    assert await ensure_schema(engine, auto_migrate=True) == latest_version()
+    assert await ensure_schema(engine, auto_migrate=False) == latest_version()
+
+async def test_archive_summary_is_backfilled_from_existing_archive(make_engine):
+    engine = make_engine()
+    await migrate(engine)
+    async with engine.begin() as conn:
+        await conn.execute(text("INSERT INTO users (id, email) VALUES ('u', 'u@example.com')"))
+        await conn.execute(text("INSERT INTO sites (id, user_id, site_url, permission_level) VALUES ('s', 'u', 'https://e.example', 'owner')"))
+        for i, (status, backlinks) in enumerate((("fixed", 2), ("fixed", None), ("ignored", 5))):
+            await conn.execute(
+                text("INSERT INTO errors_404_archive (id, site_id, url, status, backlink_count) VALUES (:id, 's', :url, :status, :backlinks)"),
+                {"id": f"e{i}", "url": f"https://e.example/{i}", "status": status, "backlinks": backlinks}
+            )
+        # Replay the migration as if the archive predated the summary table
+        await conn.execute(text("DELETE FROM errors_404_archive_summary"))
+        await conn.run_sync(migrations._archive_summary)
+
+        rows = (await conn.execute(text(
+            "SELECT status, error_count, backlink_count FROM errors_404_archive_summary ORDER BY status"
+        ))).all()
+    assert [tuple(row) for row in rows] == [("fixed", 2, 2), ("ignored", 1, 5)]
@@ -0,0 +1,126 @@
+import asyncio
+import marshal
+
+import pytest
+from sqlalchemy import select, func
+
+import profiling
+from config import settings
+from models import RequestProfileDB
+from profiling import ProfilingMiddleware, profiled, outbound_span
+
+pytestmark = pytest.mark.anyio
+
+TOKEN = "secret"
+
+@pytest.fixture(autouse=True)
+def profiling_token(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", TOKEN)
+
+async def stored_profiles(db) -> int:
+    async with db() as session:
+        return (await session.execute(select(func.count()).select_from(RequestProfileDB))).scalar()
+
+async def test_only_requests_with_the_token_are_profiled(db, make_site, client_for):
+    await make_site()
+    client = client_for()
+
+    assert "x-profile-id" not in (await client.get("/api/sites")).headers
+    assert "x-profile-id" not in (await client.get("/api/sites", headers={"X-Profile": "wrong"})).headers
+    assert "x-profile-id" in (await client.get("/api/sites", headers={"X-Profile": TOKEN})).headers
+    assert "x-profile-id" in (await client.get("/api/sites", params={"profile": TOKEN})).headers
+    assert await stored_profiles(db) == 2
+
+async def test_profile_details_and_download(db, make_site, client_for):
+    await make_site()
+    client = client_for()
+    profile_id = (await client.get("/api/sites", headers={"X-Profile": TOKEN})).headers["x-profile-id"]
+    headers = {"X-Profile-Token": TOKEN}
+
+    listed = (await client.get("/api/profiles", params={"kind": "request"}, headers=headers)).json()["profiles"]
+    assert [p["id"] for p in listed] == [profile_id]
+
+    profile = (await client.get(f"/api/profiles/{profile_id}", headers=headers)).json()
+    assert profile["name"] == "GET /api/sites"
+    assert profile["cpu_scope"] == "event-loop"
+    assert profile["concurrent_requests"] == 1
+    assert profile["top_functions"]
+    assert any("FROM sites" in entry["statement"] for entry in profile["sql"])
+
+    download = await client.get(f"/api/profiles/{profile_id}/download", headers=headers)
+    assert isinstance(marshal.loads(download.content), dict)
+    assert download.headers["x-profile-scope"] == "event-loop"
+    assert download.headers["x-concurrent-requests"] == "1"
+    assert f"{profile_id}.event-loop.prof" in download.headers["content-disposition"]
+
+async def test_profile_endpoints_hide_without_token(db, client_for):
+    client = client_for()
+    assert (await client.get("/api/profiles")).status_code == 404
+    assert (await client.get("/api/profiles", headers={"X-Profile-Token": "wrong"})).status_code == 404
+
+async def test_retention_keeps_newest_profiles(db, monkeypatch):
+    monkeypatch.setattr(settings, "profile_retention", 3)
+
+    for i in range(5):
+        async with profiled("scan", f"scan-{i}", force=True):
+            pass
+
+    async with db() as session:
+        names = (await session.execute(select(RequestProfileDB.name).order_by(RequestProfileDB.started_at))).scalars().all()
+    assert names == ["scan-2", "scan-3", "scan-4"]
+
+async def test_nested_and_unsampled_blocks_are_not_profiled(db):
+    async with profiled("scan", "outer", force=True) as outer:
+        async with profiled("scan", "inner", force=True) as inner:
+            assert inner is None
+        assert outer is not None
+
+    async with profiled("scan", "sampled") as sampled:
+        assert sampled is None
+    assert await stored_profiles(db) == 1
+    assert profiling._active is None
+
+async def test_outbound_spans_record_errors(db):
+    async with profiled("scan", "with-spans", force=True) as profile:
+        with outbound_span("gsc.searchanalytics.query"):
+            pass
+        with pytest.raises(ValueError):
+            with outbound_span("openai.chat"):
+                raise ValueError("quota exceeded")
+
+    assert [(s["name"], s["error"]) for s in profile.spans] == [
+        ("gsc.searchanalytics.query", None),
+        ("openai.chat", "quota exceeded"),
+    ]
+
+async def test_profile_records_requests_sharing_the_loop(db):
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/slow":
+            await release.wait()
+        await asyncio.sleep(0)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def request(path: str, headers=()) -> list:
+        sent = []
+        async def send(message):
+            sent.append(message)
+        scope = {"type": "http", "method": "GET", "path": path, "headers": list(headers), "query_string": b""}
+        await ProfilingMiddleware(app)(scope, None, send)
+        return sent
+
+    slow = asyncio.create_task(request("/slow", [(b"x-profile", TOKEN.encode())]))
+    await asyncio.sleep(0)
+    # Both arrive while /slow is being profiled and are not profiled themselves
+    others = await asyncio.gather(request("/fast"), request("/fast"))
+    assert all(m["headers"] == [] for sent in others for m in sent if m["type"] == "http.response.start")
+    release.set()
+    await slow
+
+    async with db() as session:
+        profile = (await session.execute(select(RequestProfileDB))).scalar_one()
+    assert profile.name == "GET /slow"
+    assert profile.concurrent_requests == 3
+    assert profiling._in_flight == 0
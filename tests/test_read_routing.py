@@ -0,0 +1,58 @@
+import pytest
+
+import database
+from config import settings
+from database import PRIMARY_STICKY_COOKIE
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def profiling_token(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", "secret")
+    return "secret"
+
+async def test_reads_go_to_replica_until_client_writes(make_site, client_for):
+    await make_site()
+    client = client_for()
+    before = dict(database.routing_stats)
+
+    assert (await client.get("/api/sites")).status_code == 200
+    assert database.routing_stats["replica"] == before["replica"] + 1
+
+    created = await client.post("/api/sites", json={"site_url": "https://other.example"})
+    assert created.status_code == 200
+    assert PRIMARY_STICKY_COOKIE in created.cookies
+
+    sites = await client.get("/api/sites")
+    assert len(sites.json()["sites"]) == 2
+    assert database.routing_stats["sticky"] == before["sticky"] + 1
+
+async def test_failed_writes_do_not_pin_reads_to_primary(make_site, client_for):
+    await make_site()
+    duplicate = await client_for().post("/api/sites", json={"site_url": "https://example.com"})
+    assert duplicate.status_code == 400
+    assert PRIMARY_STICKY_COOKIE not in duplicate.cookies
+
+async def test_profiles_record_sql_run_on_replicas(make_site, client_for, profiling_token):
+    await make_site()
+    client = client_for()
+
+    response = await client.get("/api/errors", headers={"X-Profile": profiling_token})
+    profile_id = response.headers["x-profile-id"]
+
+    profile = (await client.get(f"/api/profiles/{profile_id}", headers={"X-Profile-Token": profiling_token})).json()
+    assert any("FROM errors_404" in entry["statement"] for entry in profile["sql"])
+
+async def test_database_health_requires_metrics_token(db, client_for, profiling_token, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "metrics")
+    client = client_for()
+    assert (await client.get("/api/health/db")).status_code == 404
+    # The profiling token does not grant access to metrics
+    assert (await client.get("/api/health/db", headers={"X-Metrics-Token": profiling_token})).status_code == 404
+
+    health = await client.get("/api/health/db", headers={"X-Metrics-Token": "metrics"})
+    assert health.status_code == 200
+    assert len(health.json()["replicas"]) == 1
+
+async def test_database_health_is_disabled_without_metrics_token(db, client_for):
+    assert (await client_for().get("/api/health/db", headers={"X-Metrics-Token": ""})).status_code == 404
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, func, update
+
+from models import (
+    Error404DB, BacklinkDB, RecommendationDB, SiteDB,
+    ArchivedError404DB, ArchivedBacklinkDB, ArchivedRecommendationDB, ArchiveSummaryDB
+)
+from retention import archive_resolved_errors
+
+pytestmark = pytest.mark.anyio
+
+async def count(session_factory, model) -> int:
+    async with session_factory() as session:
+        return (await session.execute(select(func.count()).select_from(model))).scalar()
+
+async def add_error(session_factory, error_id: str, status: str, age_days: int, backlinks: int = 0, recommendation: bool = False):
+    async with session_factory() as session:
+        session.add(Error404DB(
+            id=error_id, site_id="site-1", url=f"https://example.com/{error_id}", status=status,
+            backlink_count=backlinks, last_checked=datetime.utcnow() - timedelta(days=age_days)
+        ))
+        for i in range(backlinks):
+            session.add(BacklinkDB(id=f"{error_id}-b{i}", error_id=error_id, source_url=f"https://ref.example/{i}"))
+        if recommendation:
+            session.add(RecommendationDB(id=f"{error_id}-r", error_id=error_id, redirect_target="https://example.com/"))
+        await session.commit()
+
+async def test_archives_old_resolved_errors_with_children(db, make_site):
+    await make_site()
+    await add_error(db, "old-fixed", "fixed", 120, backlinks=2, recommendation=True)
+    await add_error(db, "old-ignored", "ignored", 120)
+    await add_error(db, "old-new", "new", 120)
+    await add_error(db, "recent-fixed", "fixed", 5)
+
+    assert await archive_resolved_errors(db, older_than_days=90, batch_size=1) == 2
+
+    async with db() as session:
+        live = set((await session.execute(select(Error404DB.id))).scalars().all())
+        archived = set((await session.execute(select(ArchivedError404DB.id))).scalars().all())
+    assert live == {"old-new", "recent-fixed"}
+    assert archived == {"old-fixed", "old-ignored"}
+    assert await count(db, BacklinkDB) == 0
+    assert await count(db, RecommendationDB) == 0
+    assert await count(db, ArchivedBacklinkDB) == 2
+    assert await count(db, ArchivedRecommendationDB) == 1
+
+async def test_max_batches_bounds_a_run(db, make_site):
+    await make_site()
+    for i in range(5):
+        await add_error(db, f"e{i}", "fixed", 120)
+
+    assert await archive_resolved_errors(db, older_than_days=90, batch_size=2, max_batches=1) == 2
+    assert await archive_resolved_errors(db, older_than_days=90, batch_size=2) == 3
+
+async def test_summary_accumulates_across_batches(db, make_site):
+    await make_site()
+    for i in range(3):
+        await add_error(db, f"fixed-{i}", "fixed", 120, backlinks=i)
+    await add_error(db, "ignored-0", "ignored", 120, backlinks=4)
+
+    assert await archive_resolved_errors(db, older_than_days=90, batch_size=1) == 4
+
+    async with db() as session:
+        summary = (await session.execute(
+            select(ArchiveSummaryDB.status, ArchiveSummaryDB.error_count, ArchiveSummaryDB.backlink_count)
+        )).all()
+    assert sorted(summary) == [("fixed", 3, 3), ("ignored", 1, 4)]
+
+async def test_rescan_does_not_resurrect_archived_errors(db, make_site, client_for):
+    await make_site()
+    client = client_for()
+
+    scan = await client.post("/api/sites/site-1/scan")
+    assert scan.status_code == 200
+    found = scan.json()["errors_found"]
+    assert found > 0
+
+    bulk = await client.patch("/api/errors", json={"status": "ignored", "site_id": "site-1"})
+    assert bulk.json()["updated"] == found
+
+    async with db() as session:
+        await session.execute(update(Error404DB).values(last_checked=datetime.utcnow() - timedelta(days=120)))
+        await session.execute(update(SiteDB).values(last_scan=datetime.utcnow() - timedelta(days=1)))
+        await session.commit()
+    assert await archive_resolved_errors(db, older_than_days=90) == found
+
+    rescan = await client.post("/api/sites/site-1/scan")
+    assert rescan.status_code == 200
+    assert rescan.json()["errors_found"] == 0
+    assert await count(db, Error404DB) == 0
+
+    stats = (await client.get("/api/dashboard/stats")).json()
+    assert stats["total_errors"] == found
+    assert stats["new_errors"] == 0
+
+    archived = (await client.get("/api/errors/archive")).json()
+    assert {e["status"] for e in archived["errors"]} == {"ignored"}
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+import server
+from models import ScanLogDB, SiteDB
+from scan_lock import ScanCoordinator
+
+pytestmark = pytest.mark.anyio
+
+async def scan_logs(db) -> list:
+    async with db() as session:
+        return (await session.execute(select(ScanLogDB))).scalars().all()
+
+async def test_concurrent_runs_share_one_scan():
+    coordinator = ScanCoordinator()
+    started = 0
+    release = asyncio.Event()
+
+    async def scan():
+        nonlocal started
+        started += 1
+        await release.wait()
+        return {"errors_found": 3}
+
+    first = asyncio.create_task(coordinator.run("site-1", scan))
+    second = asyncio.create_task(coordinator.run("site-1", scan))
+    await asyncio.sleep(0)
+    assert coordinator.is_running("site-1")
+
+    release.set()
+    assert await first == ({"errors_found": 3}, False)
+    assert await second == ({"errors_found": 3}, True)
+    assert started == 1
+    assert not coordinator.is_running("site-1")
+
+async def test_cancelled_caller_does_not_cancel_shared_scan():
+    coordinator = ScanCoordinator()
+    release = asyncio.Event()
+
+    async def scan():
+        await release.wait()
+        return {"errors_found": 1}
+
+    first = asyncio.create_task(coordinator.run("site-1", scan))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(coordinator.run("site-1", scan))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    release.set()
+    assert await second == ({"errors_found": 1}, True)
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+async def test_concurrent_triggers_record_a_single_scan(db, make_site, client_for, monkeypatch):
+    await make_site()
+    original = server.history_priority_scores
+
+    async def slow_history_scores(*args, **kwargs):
+        # Keep the first scan running while the second trigger arrives
+        await asyncio.sleep(0.05)
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(server, "history_priority_scores", slow_history_scores)
+    client = client_for()
+
+    responses = await asyncio.gather(
+        client.post("/api/sites/site-1/scan"),
+        client.post("/api/sites/site-1/scan"),
+    )
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert sorted(r.json()["coalesced"] for r in responses) == [False, True]
+    assert len({r.json()["scan_id"] for r in responses}) == 1
+    assert len(await scan_logs(db)) == 1
+
+async def test_rescan_within_interval_is_rejected(db, make_site, client_for):
+    await make_site()
+    client = client_for()
+
+    assert (await client.post("/api/sites/site-1/scan")).status_code == 200
+
+    rejected = await client.post("/api/sites/site-1/scan")
+    assert rejected.status_code == 429
+    assert 0 < int(rejected.headers["Retry-After"]) <= server.settings.min_rescan_interval_seconds + 1
+
+    async with db() as session:
+        await session.execute(update(SiteDB).values(last_scan=datetime.utcnow() - timedelta(days=1)))
+        await session.commit()
+    assert (await client.post("/api/sites/site-1/scan")).status_code == 200
+
+async def test_scan_completed_while_waiting_for_lock_is_reused(db, make_site):
+    await make_site()
+    requested_at = datetime.utcnow()
+    async with db() as session:
+        session.add(ScanLogDB(id="earlier", site_id="site-1", scan_type="manual", status="completed",
+                              errors_found=2, completed_at=requested_at + timedelta(seconds=1)))
+        await session.commit()
+
+    result = await server.run_site_scan("site-1", "user-1", requested_at)
+
+    assert result == {"errors_found": 2, "scan_id": "earlier", "coalesced": True}
+    assert len(await scan_logs(db)) == 1
+
+async def test_unknown_site_is_not_found(db, make_site, client_for):
+    await make_site("user-2", "site-2")
+    assert (await client_for("user-1").post("/api/sites/site-2/scan")).status_code == 404
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+from sqlalchemy import select, func
+
+from load_test import percentile
+from models import UserDB, SiteDB, Error404DB, BacklinkDB, RecommendationDB
+from seed_data import Generator, allocate, build_parser, seed
+
+pytestmark = pytest.mark.anyio
+
+async def count(session_factory, model) -> int:
+    async with session_factory() as session:
+        return (await session.execute(select(func.count()).select_from(model))).scalar()
+
+@pytest.mark.parametrize("total, weights", [(10, [1, 1, 1]), (7, [0.1, 5.0]), (1000, [3.7, 0.2, 11.0, 1.0]), (0, [1, 2])])
+async def test_allocate_shares_sum_to_total(total, weights):
+    shares = allocate(total, weights)
+    assert sum(shares) == total
+    assert len(shares) == len(weights)
+    assert all(share >= 0 for share in shares)
+
+async def test_allocate_follows_weights():
+    assert allocate(100, [3, 1]) == [75, 25]
+
+async def test_percentile_picks_nearest_rank():
+    ordered = [float(i) for i in range(1, 101)]
+    assert percentile(ordered, 0.0) == 1.0
+    assert percentile(ordered, 0.5) == 51.0
+    assert percentile(ordered, 0.99) == 99.0
+    assert percentile(ordered, 1.0) == 100.0
+    assert percentile([], 0.95) == 0.0
+
+async def test_backlinks_are_zero_inflated_around_the_target_mean():
+    generator = Generator(random.Random(1), backlinks_mean=3.0, recommendation_ratio=0.3, zero_backlink_ratio=0.6)
+    counts = [generator.backlink_count() for _ in range(50000)]
+
+    assert counts.count(0) / len(counts) == pytest.approx(0.6, abs=0.01)
+    assert sum(counts) / len(counts) == pytest.approx(3.0, rel=0.15)
+    assert max(counts) <= 5000
+
+async def test_seed_inserts_rows_and_writes_manifest(db):
+    args = build_parser().parse_args(["--users", "2", "--sites-per-user", "2", "--errors", "50", "--batch-size", "7"])
+    result = await seed(args)
+    manifest, inserted = result["manifest"], result["inserted"]
+
+    assert await count(db, UserDB) == 2
+    assert await count(db, SiteDB) == 4
+    assert await count(db, Error404DB) == inserted["errors"] == 50
+    assert await count(db, BacklinkDB) == inserted["backlinks"]
+    assert await count(db, RecommendationDB) == inserted["recommendations"]
+
+    async with db() as session:
+        owners = dict((await session.execute(select(SiteDB.id, SiteDB.user_id))).all())
+        errors = dict((await session.execute(select(Error404DB.id, Error404DB.site_id))).all())
+    assert sorted(manifest["users"]) == sorted(set(owners.values()))
+    assert {s["id"]: s["user_id"] for s in manifest["sites"]} == owners
+    assert len(manifest["errors"]) == 50
+    assert all(owners[errors[e["id"]]] == e["user_id"] for e in manifest["errors"])